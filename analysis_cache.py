@@ -0,0 +1,105 @@
+"""Persistent, content-addressed cache for job suitability analyses.
+
+An analysis depends only on the posting, the profile it is judged against
+and the model, so the cache key is a SHA-256 of the normalised title, the
+description, the profile text and the model name. Reposts, the same job on
+another portal and re-runs after a crash all hit the cache instead of the
+LLM. Entries live in a local SQLite file, expire after `ttl` seconds and the
+least recently used ones are evicted once `max_entries` is exceeded.
+"""
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+
+CACHE_PATH = "analysis_cache.db"
+DEFAULT_TTL = 30 * 24 * 3600      # 30 days
+DEFAULT_MAX_ENTRIES = 20000
+
+
+def _normalise(text):
+    return re.sub(r"\s+", " ", (text or "")).strip().lower()
+
+
+def cache_key(job_title, job_description, profile, model):
+    """Return the content hash identifying one analysis."""
+    digest = hashlib.sha256()
+    for part in (_normalise(job_title), _normalise(job_description), _normalise(profile), model):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class AnalysisCache:
+    """
+    SQLite-backed analysis cache with TTL and size-bounded LRU eviction.
+
+    Args:
+        path: SQLite file to store entries in.
+        ttl: Seconds after which an entry is treated as missing.
+        max_entries: Entries kept before the least recently used are evicted.
+    """
+
+    def __init__(self, path=CACHE_PATH, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS analyses ("
+            " key TEXT PRIMARY KEY, analysis TEXT NOT NULL,"
+            " created_at REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS analyses_last_used ON analyses (last_used)")
+        self._conn.commit()
+
+    def get(self, key):
+        """Return the cached analysis for `key`, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT analysis FROM analyses WHERE key = ? AND created_at > ?",
+                (key, now - self.ttl),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE analyses SET last_used = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key, analysis):
+        """Store `analysis` under `key` and evict old entries if over capacity."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO analyses (key, analysis, created_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, analysis, now, now),
+            )
+            self._conn.execute("DELETE FROM analyses WHERE created_at <= ?", (now - self.ttl,))
+            self._conn.execute(
+                "DELETE FROM analyses WHERE key IN ("
+                " SELECT key FROM analyses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def stats(self):
+        """Return hit/miss counters and the current number of entries."""
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": size,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -1,109 +1,105 @@
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from pymongo import MongoClient
-import time
-from dotenv import load_dotenv
 import os
-import pickle  # For saving and loading cookies
-
-# Load environment variables
-load_dotenv()
-mongo_uri = os.getenv("MONGO_URI")
+import argparse
+import multiprocessing
+import socket
+import time
+from datetime import datetime, timezone
+import config
+import quotas
+from clients import lazy_database
+from browser_pool import get_pool
+from session_store import get_session_store
+from job_store import claim_next_job, complete_claim, ensure_indexes
+from job_watch import JobWatcher
+from tracing import get_logger, job_log, span
+from watermarks import portal_name
+from waits import (wait_for, network_idle, selector_absent, selector_present,
+                   url_changed, any_of, log_timing_summary)
+
+# Environment variables are loaded by clients.py
 USERNAME = os.getenv("PORTAL_EMAIL")
 PASSWORD = os.getenv("PORTAL_PASSWORD")
 
-# MongoDB Setup
-client = MongoClient(mongo_uri, tls=True, tlsAllowInvalidCertificates=True)
-db = client['job_scraper']  
+# MongoDB Setup, connected on first use
+db = lazy_database('job_scraper')
 collection = db['processeng_jobs']  
-COOKIE_FILE = "cookies.pkl"
+quota_collection = db['quotas']
+watch_state_collection = db['watch_state']
+# Portal session cookies, shared by every browser this process borrows
+portal_session = get_session_store("portal", USERNAME)
+log = get_logger("applier")
 
+# Outcomes of apply_to_job
+APPLIED = "applied"
+FAILED = "failed"              # Something went wrong with this job
+LOGIN_FAILED = "login_failed"  # The portal login, not the job, is the problem
+MAX_CONSECUTIVE_FAILURES = 3   # Jobs failing in a row before a worker assumes the portal is down
 
-def save_cookies(driver, filename):
-    """Save cookies to a file."""
-    with open(filename, "wb") as file:
-        pickle.dump(driver.get_cookies(), file)
-    print(f"[DEBUG] Cookies saved to {filename}")
 
-
-def load_and_force_cookies(driver, filename, url):
-    """Load cookies from a file and inject them into the browser session."""
-    try:
-        with open(filename, "rb") as file:
-            cookies = pickle.load(file)
-        driver.get(url)  # Open the base URL before injecting cookies
-        time.sleep(5)  # Ensure the page loads before injecting cookies
-        for cookie in cookies:
-            driver.add_cookie(cookie)
-        print(f"[DEBUG] Cookies loaded and forced from {filename}")
-        driver.refresh()  # Refresh the page after injecting cookies
-        time.sleep(5)
-        return True
-    except FileNotFoundError:
-        print(f"[DEBUG] Cookie file {filename} not found.")
-        return False
-
-
-def login_to_portal(driver, login_credentials):
+def login_to_portal(driver, login_credentials, job_id=None):
     """
     Logs into the job portal using the provided credentials.
 
     Args:
         driver: Selenium WebDriver instance.
         login_credentials: A dictionary containing 'username' and 'password'.
+        job_id: Job being applied to, used to sample its log lines.
 
     Returns:
         bool: True if login is successful, False otherwise.
     """
+    extra = job_log(job_id)
     try:
-        print("[DEBUG] Checking if login fields are present...")
+        log.debug("Checking if login fields are present...", extra=extra)
 
         # Wait for the username field using CSS selector
         email_input = WebDriverWait(driver, 20).until(
             EC.element_to_be_clickable((By.CSS_SELECTOR, "input#username"))
         )
-        print("[DEBUG] Email input field located.")
+        log.debug("Email input field located.", extra=extra)
 
         # Ensure the element is interactable
         driver.execute_script("arguments[0].focus();", email_input)
         email_input.clear()
         email_input.send_keys(login_credentials['username'])
-        print("[DEBUG] Entered email address.")
+        log.debug("Entered email address.", extra=extra)
 
         # Wait for the password field using CSS selector
         password_input = WebDriverWait(driver, 20).until(
             EC.element_to_be_clickable((By.CSS_SELECTOR, "input#password"))
         )
-        print("[DEBUG] Password input field located.")
+        log.debug("Password input field located.", extra=extra)
 
         driver.execute_script("arguments[0].focus();", password_input)
         password_input.clear()
         password_input.send_keys(login_credentials['password'])
-        print("[DEBUG] Entered password.")
+        log.debug("Entered password.", extra=extra)
 
         # Click the "Sign In" button using CSS selector
         sign_in_button = WebDriverWait(driver, 20).until(
             EC.element_to_be_clickable((By.CSS_SELECTOR, "button[onclick*='validateFields']"))
         )
+        login_url = driver.current_url
         sign_in_button.click()
-        print("[DEBUG] Clicked 'Sign In' button.")
+        log.debug("Clicked 'Sign In' button.", extra=extra)
 
-        # Allow time for the login process
-        time.sleep(30)
+        # Wait for the login form to go away or the portal to redirect
+        wait_for(driver, any_of(url_changed(login_url), selector_absent("input#username")), "login")
 
         # Verify if login succeeded by checking for login elements
         try:
             driver.find_element(By.CSS_SELECTOR, "input#username")
-            print("[DEBUG] Login failed. Username field still present.")
+            log.warning("Login failed. Username field still present.", extra=extra)
             return False
         except Exception:
-            print("[DEBUG] Login successful. Username field no longer present.")
+            log.info("Login successful. Username field no longer present.", extra=extra)
             return True
 
     except Exception as e:
-        print(f"[DEBUG] Login process encountered an error: {e}")
+        log.warning("Login process encountered an error: %s", e, extra=extra)
         return False
 
 
@@ -118,98 +114,199 @@ def apply_to_job(driver, job, collection, login_credentials):
         job: A dictionary containing job details, including the link.
         collection: MongoDB collection object to update job status.
         login_credentials: A dictionary containing 'username' and 'password'.
+
+    Returns:
+        str: APPLIED, FAILED, or LOGIN_FAILED if the portal rejected the credentials.
     """
+    extra = job_log(job["Job ID"])
     try:
-        # Step 1: Navigate to the job description page
-        print(f"[DEBUG] Opening job link: {job['Link']}")
-        driver.get(job["Link"])
-        time.sleep(10)
-        print("[DEBUG] Cookies after navigating to job page:", driver.get_cookies())
+        # Step 1: Navigate to the job description page, reusing a stored portal session if valid
+        with span("apply_step", step="job_page"):
+            portal_session.apply(driver, job["Link"])
+            log.debug("Opening job link: %s", job['Link'], extra=extra)
+            driver.get(job["Link"])
+            wait_for(driver, selector_present("a.apply.dialogApplyBtn"), "job_page")
 
         # Step 2: Click the "Apply Now" button
-        try:
-            print("[DEBUG] Searching for 'Apply Now' button...")
-            apply_now_button = WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable((By.CSS_SELECTOR, "a.btn.btn-primary.btn-large.btn-lg.apply.dialogApplyBtn"))
-            )
-            apply_now_button.click()
-            print("[DEBUG] 'Apply Now' button clicked")
-            time.sleep(5)
-            print("[DEBUG] Cookies after clicking 'Apply Now':", driver.get_cookies())
-        except Exception as e:
-            print(f"[DEBUG] Failed to click 'Apply Now' button: {e}")
-            return False
+        with span("apply_step", step="apply_now") as step_span:
+            try:
+                log.debug("Searching for 'Apply Now' button...", extra=extra)
+                apply_now_button = WebDriverWait(driver, 10).until(
+                    EC.element_to_be_clickable((By.CSS_SELECTOR, "a.btn.btn-primary.btn-large.btn-lg.apply.dialogApplyBtn"))
+                )
+                job_url = driver.current_url
+                apply_now_button.click()
+                log.debug("'Apply Now' button clicked", extra=extra)
+                wait_for(driver, any_of(url_changed(job_url), selector_present("input#username")), "apply_dialog")
+            except Exception as e:
+                step_span.outcome = "error"
+                log.warning("Failed to click 'Apply Now' button: %s", e, extra=extra)
+                return FAILED
 
         # Step 3: Handle login if redirected or login page detected
-        try:
-            print("[DEBUG] Checking for login elements...")
-            email_input = driver.find_element(By.ID, "username")  # Check if username field exists
-            print("[DEBUG] Login page detected. Proceeding to log in...")
-    
-        # Perform the login
-            if not login_to_portal(driver, login_credentials):
-                print("[DEBUG] Login failed. Could not apply for the job.")
-            return False
-        except Exception:
-            print("[DEBUG] Login page not detected. Proceeding to the next step...")
-        # No login elements found, proceed to step 4
+        if driver.find_elements(By.ID, "username"):
+            log.info("Login page detected. Proceeding to log in...", extra=extra)
+            with span("apply_step", step="login") as step_span:
+                portal_session.invalidate()  # The stored session (if any) was rejected
+                if not login_to_portal(driver, login_credentials, job["Job ID"]):
+                    step_span.outcome = "error"
+                    log.warning("Login failed. Could not apply for the job.", extra=extra)
+                    return LOGIN_FAILED
+                portal_session.save(driver)
+        else:
+            log.debug("Login page not detected. Proceeding to the next step...", extra=extra)
 
 
         # Step 4: Locate the "Apply" button
-        try:
-            print("[DEBUG] Searching for 'Apply' button on the application page...")
-            apply_button = WebDriverWait(driver, 20).until(
-                EC.element_to_be_clickable((By.ID, "301:_submitBtn"))
-            )
-            apply_button.click()
-            print("[DEBUG] Successfully clicked 'Apply' button.")
-            time.sleep(10)
-            print("[DEBUG] Cookies after applying for the job:", driver.get_cookies())
-
-            # Step 5: Update job status in MongoDB
-            print("[DEBUG] Updating job status in MongoDB...")
+        with span("apply_step", step="submit") as step_span:
+            try:
+                log.debug("Searching for 'Apply' button on the application page...", extra=extra)
+                apply_button = WebDriverWait(driver, 20).until(
+                    EC.element_to_be_clickable((By.ID, "301:_submitBtn"))
+                )
+                apply_button.click()
+                log.debug("Successfully clicked 'Apply' button.", extra=extra)
+                wait_for(driver, network_idle(), "submit_application")
+            except Exception as e:
+                step_span.outcome = "error"
+                log.warning("Failed to complete 'Apply' process: %s (at %s)", e, driver.current_url, extra=extra)
+                log.debug("Page Source Snippet: %s", driver.page_source[:500], extra=extra)
+                return FAILED
+
+        # Step 5: Update job status in MongoDB
+        with span("mongo", op="mark_applied"):
             collection.update_one(
                 {"Job ID": job["Job ID"]},
                 {"$set": {"Applied": True}},
                 upsert=False
             )
-            print(f"[DEBUG] Job status updated to 'Applied' for: {job['Title']}")
-            return True
-
-        except Exception as e:
-            print(f"[DEBUG] Failed to complete 'Apply' process: {e}")
-            print("[DEBUG] Current URL:", driver.current_url)
-            print("[DEBUG] Page Source Snippet:", driver.page_source[:500])
-            return False
+        log.info("Job status updated to 'Applied' for: %s", job['Title'], extra=extra)
+        portal_session.refresh_from(driver)  # Keep renewed cookies before the stored ones expire
+        return APPLIED
 
     except Exception as e:
-        print(f"[DEBUG] Error in applying for job '{job['Title']}': {e}")
-        return False
+        log.warning("Error in applying for job '%s': %s", job['Title'], e, extra=extra)
+        return FAILED
+
 
+def run_worker(worker_id=None, max_jobs=None):
+    """
+    Claim and apply to eligible jobs until none are left or the weekly quota is used up.
+
+    The worker also stops if the portal login fails, or after
+    `MAX_CONSECUTIVE_FAILURES` failed jobs in a row, so an outage or bad
+    credentials don't burn through the attempts of every eligible job.
 
-def main():
-    print("[DEBUG] Fetching jobs with False status...")
-    pending_jobs = collection.find({"Applied": False}).limit(5)
+    Args:
+        worker_id: Identifier stored on claims; defaults to host and process ID.
+        max_jobs: Optional cap on applications attempted by this worker.
+
+    Returns:
+        int: Number of successful applications.
+    """
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
     login_credentials = {"username": USERNAME, "password": PASSWORD}
+    ensure_indexes(collection)
 
-    print("[DEBUG] Setting up Selenium WebDriver...")
-    options = webdriver.ChromeOptions()
-    options.add_argument('--headless')
-    options.add_argument('--disable-gpu')
-    options.add_argument('--no-sandbox')
-    options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36")
-    driver = webdriver.Chrome(options=options)
+    log.info("[%s] Borrowing WebDriver from the browser pool...", worker_id)
+    pool = get_pool("applier")
+    driver = pool.acquire()
+    applied = attempted = failures = 0
 
     try:
-        for job in pending_jobs:
-            print(f"[DEBUG] Processing job: {job['Title']}")
-            success = apply_to_job(driver, job, collection, login_credentials)
-            if not success:
-                print(f"[DEBUG] Failed to apply for job: {job['Title']}")
+        while max_jobs is None or attempted < max_jobs:
+            # The weekly limit is shared by every worker through the quotas collection
+            if not quotas.reserve(quota_collection, "apply", config.weeklyApplicationLimit):
+                log.info("[%s] Weekly application limit reached.", worker_id)
+                break
+            job = claim_next_job(collection, worker_id)
+            if job is None:
+                quotas.release(quota_collection, "apply")
+                log.info("[%s] No eligible jobs left.", worker_id)
+                break
+
+            attempted += 1
+            log.info("[%s] Processing job: %s", worker_id, job['Title'], extra=job_log(job["Job ID"]))
+            with span("apply", job_id=job["Job ID"], portal=portal_name(job["Link"])) as apply_span:
+                outcome = apply_to_job(driver, job, collection, login_credentials)
+                apply_span.outcome = outcome
+            # A failed login says nothing about the job, so it doesn't use up one of its attempts
+            complete_claim(collection, job, worker_id, outcome == APPLIED, count_attempt=outcome != LOGIN_FAILED)
+            if outcome == APPLIED:
+                applied += 1
+                failures = 0
+                continue
+            quotas.release(quota_collection, "apply")
+            if outcome == LOGIN_FAILED:
+                log.error("[%s] Could not log in to the portal; stopping before claiming more jobs.", worker_id)
+                break
+            failures += 1
+            log.warning("[%s] Failed to apply for job: %s", worker_id, job['Title'], extra=job_log(job["Job ID"]))
+            if failures >= MAX_CONSECUTIVE_FAILURES:
+                log.error("[%s] %d jobs in a row failed; stopping in case the portal is down.", worker_id, failures)
+                break
     finally:
-        driver.quit()
-        print("[DEBUG] Job application process completed.")
+        pool.release(driver)
+        log.info("[%s] Applied to %d of %d jobs.", worker_id, applied, attempted)
+        log_timing_summary()
+
+    return applied
+
+
+def watch(worker_id=None, max_wait=None):
+    """
+    Apply to jobs as they become eligible, until interrupted.
+
+    Drains every eligible job, then blocks on `JobWatcher` until the scraper
+    stores a new one (or `max_wait` seconds pass, so jobs whose claims
+    expired or whose retry time came are retried, and a failed login is
+    tried again). While the weekly quota is used up the worker
+    sleeps until the quota window ends instead of watching.
+
+    Args:
+        worker_id: Identifier stored on claims; defaults to host and process ID.
+        max_wait: Longest wait between drains; defaults to `config.applyPollInterval`.
+    """
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    max_wait = max_wait or config.applyPollInterval
+    ensure_indexes(collection)
+    watcher = JobWatcher(collection, watch_state_collection)
+    log.info("[%s] Watching for eligible jobs.", worker_id)
+    try:
+        while True:
+            if quotas.used(quota_collection, "apply") >= config.weeklyApplicationLimit:
+                now = datetime.now(timezone.utc)
+                pause = (quotas.window_end("apply", now) - now).total_seconds()
+                log.info("[%s] Weekly application limit reached; sleeping %.0f s.", worker_id, pause)
+                time.sleep(max(pause, 1))
+                continue
+            run_worker(worker_id)
+            watcher.wait(max_wait)
+    except KeyboardInterrupt:
+        log.info("[%s] Stopped watching.", worker_id)
+    finally:
+        watcher.close()
+
+
+def main(workers=1, watch_mode=False):
+    """Run `workers` apply workers, each in its own process with its own browser."""
+    target = watch if watch_mode else run_worker
+    if workers <= 1:
+        target()
+    else:
+        # Spawn rather than fork: MongoClient and WebDriver connections are not fork-safe
+        context = multiprocessing.get_context("spawn")
+        processes = [context.Process(target=target, name=f"applier-{n}") for n in range(workers)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+    log.info("Job application process completed.")
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Apply to jobs the scraper marked as suitable.")
+    parser.add_argument("--workers", type=int, default=1, help="Number of parallel browser workers")
+    parser.add_argument("--watch", action="store_true", help="Keep running and apply to new jobs as they arrive")
+    args = parser.parse_args()
+    main(args.workers, args.watch)
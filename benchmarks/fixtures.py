@@ -0,0 +1,221 @@
+"""Local stand-ins for the careers portal, LinkedIn job pages and the OpenAI API.
+
+`PortalServer` serves paginated `tr.data-row` listings, detail pages, a login
+form and an apply form shaped like the ones `scraper.py` and `applier.py`
+expect, plus LinkedIn-style job pages for `linkedin.py`. `FakeOpenAIServer`
+answers `/v1/chat/completions` in the batched JSON format `llm_client.py`
+asks for, after a configurable delay. Both run in a background thread.
+`memory_mongo` returns an in-memory database for runs without a mongod.
+"""
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks.pages import description_text, detail_page, listing_page
+
+LOGIN_PAGE = """<html><body><form action="/login?next={next}" method="post">
+<input id="username" name="username"/><input id="password" name="password" type="password"/>
+<button type="button" onclick="validateFields(); this.form.submit();">Sign In</button>
+</form><script>function validateFields() { return true; }</script></body></html>"""
+
+APPLY_PAGE = """<html><body><h1>Apply for job {job}</h1>
+<form action="/applied/{job}" method="get"><button id="301:_submitBtn" type="submit">Apply</button></form>
+</body></html>"""
+
+LINKEDIN_PAGE = """<html><body><h1 class="top-card-layout__title job-title">Process Engineer {job}</h1>
+<a class="topcard__org-name-link" href="/company/{job}">Company {job}</a>
+<div class="show-more-less-html job-description">{description}</div>
+<button class="jobs-apply-button" onclick="document.getElementById('modal').className='jobs-easy-apply-modal'">Easy Apply</button>
+<div id="modal" class="hidden"></div></body></html>"""
+
+
+class _Server:
+    """Run a ThreadingHTTPServer on a free local port in a daemon thread."""
+
+    handler = None
+
+    def __init__(self, **settings):
+        handler = type(self.handler.__name__, (self.handler,), {"settings": settings})
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.settings = settings
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.httpd.server_port}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    settings = {}
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real sites
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, body, content_type="text/html", status=200):
+        body = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class PortalHandler(_Handler):
+    """Careers portal and LinkedIn-style pages."""
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        rows = self.settings.get("rows_per_page", 25)
+        pages = self.settings.get("num_pages", 10)
+        time.sleep(self.settings.get("page_latency", 0.0))
+
+        if url.path == "/robots.txt":
+            return self._send("User-agent: *\nAllow: /\n", "text/plain")
+        if url.path in ("/", "/search/"):
+            start_row = int(query.get("startrow", ["0"])[0])
+            page = min(start_row // rows + 1, pages)
+            return self._send(listing_page(page, rows, pages))
+        match = re.match(r"^/job/(\d+)/?$", url.path)
+        if match:
+            job = match.group(1)
+            # With `distinct_descriptions`, later jobs repost the descriptions of earlier ones
+            distinct = self.settings.get("distinct_descriptions")
+            seed = str(int(job) % distinct) if distinct else None
+            return self._send(detail_page(job, self.settings.get("description_words", 400), seed))
+        if url.path == "/login":
+            return self._send(LOGIN_PAGE.format(next="/"))
+        match = re.match(r"^/apply/(\d+)$", url.path)
+        if match:
+            if "JSESSIONID=bench" not in self.headers.get("Cookie", ""):
+                return self._send(LOGIN_PAGE.format(next=url.path))
+            return self._send(APPLY_PAGE.format(job=match.group(1)))
+        match = re.match(r"^/applied/(\d+)$", url.path)
+        if match:
+            return self._send(f"<html><body>Application for {match.group(1)} received.</body></html>")
+        match = re.match(r"^/linkedin/jobs/view/(\d+)/?$", url.path)
+        if match:
+            job = match.group(1)
+            return self._send(LINKEDIN_PAGE.format(job=job, description=description_text(job)))
+        self._send("Not found", "text/plain", 404)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        url = urlparse(self.path)
+        if url.path == "/login":
+            self.send_response(303)
+            self.send_header("Location", parse_qs(url.query).get("next", ["/"])[0])
+            self.send_header("Set-Cookie", "JSESSIONID=bench; Path=/; Max-Age=86400")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self._send("Not found", "text/plain", 404)
+
+
+class FakeOpenAIHandler(_Handler):
+    """Minimal `/v1/chat/completions` endpoint with configurable latency."""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        time.sleep(self.settings.get("latency", 0.5))
+        content = body["messages"][-1]["content"]
+        try:
+            postings = json.loads(content)["postings"]
+        except (ValueError, KeyError, TypeError):
+            postings = [{"id": 0, "title": content}]
+        results = [{
+            "id": posting["id"],
+            "verdict": "Yes" if "engineer" in posting.get("title", "").lower() else "No",
+            "score": 75,
+            "rationale": "Benchmark verdict.",
+        } for posting in postings]
+        prompt_tokens = sum(len(message["content"]) // 4 for message in body["messages"])
+        response = {
+            "id": "chatcmpl-bench",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": json.dumps({"results": results})}}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": 40 * len(results),
+                      "total_tokens": prompt_tokens + 40 * len(results)},
+        }
+        self._send(json.dumps(response), "application/json")
+
+
+class PortalServer(_Server):
+    """Settings: rows_per_page, num_pages, page_latency (s), description_words, distinct_descriptions."""
+    handler = PortalHandler
+
+
+class FakeOpenAIServer(_Server):
+    """Settings: latency (s) per chat completion."""
+    handler = FakeOpenAIHandler
+
+
+class _MemoryCollection:
+    """mongomock collection whose `bulk_write` accepts current pymongo operations.
+
+    mongomock 4.x rejects the `sort` argument newer pymongo versions pass when
+    adding UpdateOne/InsertOne to a bulk, so they are applied one at a time.
+    Change streams fail the way they do on a standalone server.
+    """
+
+    def __init__(self, collection):
+        self._collection = collection
+
+    def __getattr__(self, name):
+        return getattr(self._collection, name)
+
+    def watch(self, *args, **kwargs):
+        from pymongo.errors import OperationFailure
+
+        raise OperationFailure("The $changeStream stage is only supported on replica sets", code=40573)
+
+    def bulk_write(self, requests, ordered=True):
+        from pymongo import InsertOne, UpdateOne
+        from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+        upserted, errors = 0, []
+        for index, request in enumerate(requests):
+            try:
+                if isinstance(request, UpdateOne):
+                    result = self._collection.update_one(request._filter, request._doc, upsert=request._upsert)
+                    upserted += result.upserted_id is not None
+                elif isinstance(request, InsertOne):
+                    self._collection.insert_one(request._doc)
+                else:
+                    raise TypeError(f"Unsupported bulk operation {type(request).__name__}")
+            except DuplicateKeyError as e:
+                errors.append({"index": index, "code": 11000, "errmsg": str(e)})
+                if ordered:
+                    break
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "nUpserted": upserted})
+        return type("BulkWriteResult", (), {"upserted_count": upserted})()
+
+
+class _MemoryDatabase:
+    def __init__(self, database):
+        self._database = database
+
+    def __getitem__(self, name):
+        return _MemoryCollection(self._database[name])
+
+
+def memory_mongo(name="job_bot_bench"):
+    """In-memory stand-in for a MongoDB database (needs mongomock)."""
+    import mongomock
+    return _MemoryDatabase(mongomock.MongoClient()[name])
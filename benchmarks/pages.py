@@ -0,0 +1,53 @@
+"""Synthetic careers-portal pages shaped like the ones `scraper.py` parses."""
+import random
+
+WORDS = ("process engineer hydroprocessing optimization safety plant operations control "
+         "python power bi simulation refinery commissioning project data analysis team "
+         "maintenance reliability chemical design troubleshooting").split()
+
+# Page chrome that real portals wrap around the results table
+BOILERPLATE = "".join(
+    f'<div class="nav-item"><a href="/page/{i}">Menu {i}</a>'
+    f'<script>var tracker{i} = {{"id": {i}}};</script></div>'
+    for i in range(200)
+)
+
+
+def job_id(page, index):
+    return f"{page:03d}{index:03d}"
+
+
+def listing_page(page, rows_per_page=25, num_pages=10, id_fn=job_id):
+    """Return the HTML of results page `page` (1-based)."""
+    rows = "".join(
+        f'<tr class="data-row">'
+        f'<td><span class="jobTitle hidden-phone"><a class="jobTitle-link" '
+        f'href="/job/{id_fn(page, i)}/">Process Engineer {id_fn(page, i)}</a></span></td>'
+        f'<td><span class="jobFacility">{id_fn(page, i)}</span></td>'
+        f'<td><span class="jobLocation">Dhahran, SA</span></td>'
+        f'<td><span class="jobDepartment">Downstream</span></td>'
+        f'</tr>'
+        for i in range(rows_per_page)
+    )
+    items = "".join(
+        f'<li class="{"active" if p == page else ""}"><a href="/search/?startrow={(p - 1) * rows_per_page}">{p}</a></li>'
+        for p in range(1, num_pages + 1)
+    )
+    return (f'<html><head><title>Search</title></head><body>{BOILERPLATE}'
+            f'<form><input class="keywordsearch-q"/><input class="keywordsearch-locationsearch"/>'
+            f'<input class="keywordsearch-button" type="submit"/></form>'
+            f'<table id="searchresults"><tbody>{rows}</tbody></table>'
+            f'<ul class="pagination">{items}</ul>{BOILERPLATE}</body></html>')
+
+
+def description_text(seed, length=400):
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) for _ in range(length))
+
+
+def detail_page(job, length=400, seed=None):
+    """Return the HTML of the detail page for job `job`; jobs with the same `seed` share a description."""
+    return (f'<html><body>{BOILERPLATE}<h1>Process Engineer {job}</h1>'
+            f'<a class="btn btn-primary btn-large btn-lg apply dialogApplyBtn" href="/apply/{job}">Apply now</a>'
+            f'<span class="jobdescription">{description_text(job if seed is None else seed, length)}</span>'
+            f'{BOILERPLATE}</body></html>')
@@ -0,0 +1,81 @@
+"""Micro-benchmark: targeted parsers vs. full BeautifulSoup trees.
+
+Usage:
+    python benchmarks/parse_bench.py [--rounds 50]
+
+Peak memory comes from tracemalloc, which only sees Python allocations; the
+C-level tree lxml builds is not included in its figure.
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import parsers  # noqa: E402
+from benchmarks.pages import detail_page, listing_page  # noqa: E402
+
+
+def legacy_listing(html):
+    """The original scrape_jobs parsing: full html.parser tree plus four row.find calls."""
+    soup = BeautifulSoup(html, 'html.parser')
+    rows = []
+    for row in soup.select('tr.data-row'):
+        title_elem = row.find('a', class_='jobTitle-link')
+        job_id_elem = row.find('span', class_='jobFacility')
+        location_elem = row.find('span', class_='jobLocation')
+        department_elem = row.find('span', class_='jobDepartment')
+        rows.append((title_elem.text.strip(), job_id_elem.text.strip(),
+                     location_elem.text.strip(), department_elem.text.strip(), title_elem['href']))
+    pagination = soup.select_one('ul.pagination')
+    next_page = pagination.find('li', class_='active').find_next_sibling('li')
+    return rows, next_page.find('a')['href']
+
+
+def legacy_description(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    return soup.find('span', class_='jobdescription').text.strip()
+
+
+def measure(func, html, rounds):
+    """Return (ms per call, peak KiB allocated during one call)."""
+    func(html)  # Warm up
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func(html)
+    elapsed = (time.perf_counter() - start) / rounds * 1000
+
+    tracemalloc.start()
+    func(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    listing = listing_page(1)
+    detail = detail_page(1)
+    backend = "lxml" if parsers.lxml is not None else "BeautifulSoup + SoupStrainer"
+    print(f"Targeted parser backend: {backend}")
+
+    cases = [
+        ("listing", legacy_listing, parsers.parse_listing, listing),
+        ("detail", legacy_description, parsers.parse_description, detail),
+    ]
+    for name, legacy, targeted, html in cases:
+        legacy_ms, legacy_kib = measure(legacy, html, args.rounds)
+        new_ms, new_kib = measure(targeted, html, args.rounds)
+        print(f"{name:8s} legacy {legacy_ms:8.2f} ms {legacy_kib:9.0f} KiB | "
+              f"targeted {new_ms:8.2f} ms {new_kib:9.0f} KiB | {legacy_ms / new_ms:5.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
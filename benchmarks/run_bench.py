@@ -0,0 +1,223 @@
+"""Offline throughput benchmark for the scrape and apply flows.
+
+Runs the real `scraper.scrape_jobs` / `applier.run_worker` code against the
+local fixtures in `benchmarks/fixtures.py` (careers portal + fake OpenAI)
+and an in-memory Mongo stand-in (mongomock, or a local mongod given with
+--mongo-uri). Reports jobs per minute, p50/p95 time per stage and peak
+memory, and appends every result to `benchmarks/results.jsonl` together
+with the git commit so runs can be compared between commits.
+
+Usage:
+    python benchmarks/run_bench.py scrape [--jobs 100] [--llm-latency 0.5] [--page-latency 0.05]
+    python benchmarks/run_bench.py apply [--jobs 10]        # needs Chrome and chromedriver
+    python benchmarks/run_bench.py compare                  # last two runs of each scenario
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.fixtures import FakeOpenAIServer, PortalServer, memory_mongo  # noqa: E402
+
+RESULTS_FILE = os.path.join(ROOT, "benchmarks", "results.jsonl")
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def stage_summary(timings):
+    """{stage: {"count", "p50", "p95"}} in seconds."""
+    return {
+        stage: {"count": len(values), "p50": percentile(values, 0.5), "p95": percentile(values, 0.95)}
+        for stage, values in timings.items() if values
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def mongo_database(mongo_uri):
+    """A fresh benchmark database on a local mongod, or in memory with mongomock."""
+    if mongo_uri:
+        from pymongo import MongoClient
+        client = MongoClient(mongo_uri)
+        client.drop_database("job_bot_bench")
+        return client["job_bot_bench"]
+    return memory_mongo("job_bot_bench")
+
+
+def reset_timings():
+    import pipeline
+    import waits
+    pipeline.stage_timings.clear()
+    waits.wait_timings.clear()
+
+
+def collect_timings():
+    import pipeline
+    import waits
+    timings = dict(pipeline.stage_timings)
+    timings.update({f"wait:{step}": values for step, values in waits.wait_timings.items()})
+    return timings
+
+
+def run_scrape(args):
+    with PortalServer(rows_per_page=args.rows_per_page, num_pages=args.pages,
+                      page_latency=args.page_latency, distinct_descriptions=args.distinct) as portal, \
+            FakeOpenAIServer(latency=args.llm_latency) as llm:
+        os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+        os.environ["OPENAI_BASE_URL"] = f"{llm.url}/v1"
+
+        import scraper
+        from analysis_cache import AnalysisCache
+        from llm_client import AnalysisClient
+
+        db = mongo_database(args.mongo_uri)
+        scraper.mongo_collection = db["processeng_jobs"]
+        scraper.watermark_collection = db["search_watermarks"]
+        scraper.description_collection = db["job_descriptions"]
+        scraper.analysis_client = AnalysisClient(scraper.PROFILE_SUMMARY, cache=AnalysisCache(":memory:"),
+                                                 base_url=f"{llm.url}/v1")
+        reset_timings()
+
+        start = time.monotonic()
+        jobs = scraper.scrape_jobs(portal.url, keyword="Process Engineer", num_jobs=args.jobs)
+        elapsed = time.monotonic() - start
+        llm_usage = scraper.analysis_client.usage_summary()
+        scraper.analysis_client.close()
+
+    return {
+        "jobs": len(jobs),
+        "seconds": elapsed,
+        "jobs_per_minute": len(jobs) / elapsed * 60 if elapsed else 0.0,
+        "stages": stage_summary(collect_timings()),
+        "llm": llm_usage,
+    }
+
+
+def run_apply(args):
+    with PortalServer() as portal:
+        import applier
+        import config
+        from session_store import SessionStore
+
+        db = mongo_database(args.mongo_uri)
+        applier.collection = db["processeng_jobs"]
+        applier.quota_collection = db["quotas"]
+        applier.USERNAME, applier.PASSWORD = "bench@example.com", "benchmark"
+        applier.portal_session = SessionStore("portal", "bench", directory=tempfile.mkdtemp())
+        config.weeklyApplicationLimit = args.jobs
+        applier.collection.insert_many([{
+            "Title": f"Process Engineer {n:06d}", "Job ID": f"{n:06d}", "Link": f"{portal.url}/job/{n:06d}/",
+            "Apply": "Y", "AI Score": 75, "Applied": False,
+        } for n in range(args.jobs)])
+        reset_timings()
+
+        start = time.monotonic()
+        try:
+            applied = applier.run_worker(worker_id="bench")
+        except Exception as e:  # Usually no Chrome/chromedriver on this machine
+            print(f"[apply] Skipped, could not run a browser: {e}")
+            return None
+        elapsed = time.monotonic() - start
+
+    return {
+        "jobs": applied,
+        "seconds": elapsed,
+        "jobs_per_minute": applied / elapsed * 60 if elapsed else 0.0,
+        "stages": stage_summary(collect_timings()),
+    }
+
+
+def print_result(result):
+    metrics = result["metrics"]
+    print(f"\n[{result['scenario']}] commit {result['commit']}: {metrics['jobs']} jobs in "
+          f"{metrics['seconds']:.2f}s = {metrics['jobs_per_minute']:.1f} jobs/min, "
+          f"peak RSS {metrics['peak_rss_mb']:.0f} MB"
+          + (f", peak traced {metrics['peak_traced_mb']:.1f} MB" if "peak_traced_mb" in metrics else ""))
+    for stage, stats in sorted(metrics["stages"].items()):
+        print(f"  {stage:28s} n={stats['count']:5d}  p50 {stats['p50'] * 1000:8.1f} ms  "
+              f"p95 {stats['p95'] * 1000:8.1f} ms")
+
+
+def compare():
+    try:
+        with open(RESULTS_FILE) as file:
+            results = [json.loads(line) for line in file if line.strip()]
+    except FileNotFoundError:
+        print("No stored results yet.")
+        return
+    for scenario in sorted({result["scenario"] for result in results}):
+        runs = [result for result in results if result["scenario"] == scenario][-2:]
+        if len(runs) < 2:
+            print(f"[{scenario}] only one run stored ({runs[0]['commit']}).")
+            continue
+        before, after = (run["metrics"]["jobs_per_minute"] for run in runs)
+        change = (after - before) / before * 100 if before else 0.0
+        print(f"[{scenario}] {runs[0]['commit']} {before:.1f} -> {runs[1]['commit']} {after:.1f} "
+              f"jobs/min ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("scenario", choices=["scrape", "apply", "compare"])
+    parser.add_argument("--jobs", type=int, default=100, help="num_jobs for scrape, seeded jobs for apply")
+    parser.add_argument("--pages", type=int, default=10, help="Result pages served by the portal")
+    parser.add_argument("--rows-per-page", type=int, default=25)
+    parser.add_argument("--page-latency", type=float, default=0.05, help="Seconds per portal response")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Seconds per chat completion")
+    parser.add_argument("--distinct", type=int, help="Distinct descriptions; the other jobs are reposts")
+    parser.add_argument("--mongo-uri", help="Use this mongod instead of mongomock")
+    parser.add_argument("--tracemalloc", action="store_true", help="Also report peak Python allocations (slower)")
+    parser.add_argument("--no-save", action="store_true", help="Don't append the result to results.jsonl")
+    args = parser.parse_args()
+
+    if args.scenario == "compare":
+        compare()
+        return
+
+    if args.tracemalloc:
+        tracemalloc.start()
+    metrics = run_scrape(args) if args.scenario == "scrape" else run_apply(args)
+    if metrics is None:
+        return
+    if args.tracemalloc:
+        metrics["peak_traced_mb"] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    metrics["peak_rss_mb"] = rss / (2 ** 20 if sys.platform == "darwin" else 2 ** 10)
+
+    result = {
+        "scenario": args.scenario,
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "params": {key: value for key, value in vars(args).items() if key not in ("scenario", "no_save")},
+        "metrics": metrics,
+    }
+    print_result(result)
+    if not args.no_save:
+        with open(RESULTS_FILE, "a") as file:
+            file.write(json.dumps(result) + "\n")
+
+
+if __name__ == "__main__":
+    main()
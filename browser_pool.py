@@ -0,0 +1,319 @@
+"""Warm WebDriver pool shared by the scraper, applier and LinkedIn bot.
+
+Browser options live here in one place and honour `browser` and `headless`
+from `config.py`. Each role ("scraper", "applier", "linkedin") gets its own
+pool of warm drivers; drivers are health-checked when handed out and
+recycled after `max_pages` page loads to keep Chrome's memory in check.
+Pools stay alive for the life of the process and are closed at exit.
+
+With `config.leanBrowser` on, drivers use the `eager` page-load strategy and
+fail the requests their role doesn't need through CDP `Fetch` interception:
+images, fonts, stylesheets and media are matched by the resource type the
+browser reports, not by URL, and trackers by their hosts. Scripts are only
+blocked when they come from a tracker host, so first-party scripts always
+load. Each role only lists the types its flows can do without (the apply
+flows keep CSS because the apply buttons are checked for visibility and
+their dialogs are shown and hidden with stylesheets), and a role's `allow`
+patterns are let through before anything is failed. Firefox has no CDP, so
+there only images are blocked, with a preference.
+"""
+import atexit
+import queue
+import threading
+from contextlib import contextmanager
+from fnmatch import fnmatchcase
+
+import config
+from tracing import get_logger
+
+# Also sent by fetcher.py with its HTTP requests
+USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+              "(KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36")
+DEFAULT_MAX_PAGES = 100
+
+# CDP resource types blocked in lean mode, by category
+BLOCK_TYPES = {
+    "images": ["Image"],
+    "fonts": ["Font"],
+    "css": ["Stylesheet"],
+    "media": ["Media"],
+}
+# Requests to these are blocked in lean mode whatever their resource type
+TRACKER_PATTERNS = [
+    "*://*.google-analytics.com/*", "*://*.googletagmanager.com/*", "*://*.doubleclick.net/*",
+    "*://connect.facebook.net/*", "*://*.hotjar.com/*", "*://bat.bing.com/*", "*://px.ads.linkedin.com/*",
+    "*://snap.licdn.com/li.lms-analytics/*", "*://www.linkedin.com/li/track*", "*://*.demdex.net/*",
+]
+# Captcha widgets draw their challenges with images and fonts of their own
+CAPTCHA_PATTERNS = ["*://www.google.com/recaptcha/*", "*://www.gstatic.com/recaptcha/*",
+                    "*://*.hcaptcha.com/*"]
+
+# Per-role settings; a headless value of None means "use config.headless".
+# `allow` lists URL patterns that are never blocked, checked before a request is failed.
+ROLES = {
+    "scraper": {  # Only used as a fallback to read page text, never needs a window
+        "headless": True, "pool_size": 1,
+        "block": ["images", "fonts", "css", "media", "trackers"],
+        "allow": [],
+    },
+    "applier": {  # Keeps CSS and first-party scripts for the Apply Now dialog and login form
+        "headless": None, "pool_size": 1,
+        "block": ["images", "fonts", "media", "trackers"],
+        "allow": CAPTCHA_PATTERNS,
+    },
+    "linkedin": {  # Keeps CSS for the Easy Apply modal; skips the heavy feed media
+        "headless": None, "pool_size": 1,
+        "block": ["images", "fonts", "media", "trackers"],
+        "allow": CAPTCHA_PATTERNS,
+    },
+}
+log = get_logger("browser_pool")
+
+
+def blocked_request_patterns(role):
+    """CDP `Fetch.RequestPattern`s of the requests `role` blocks in lean mode."""
+    patterns = []
+    for category in ROLES.get(role, {}).get("block", []):
+        if category == "trackers":
+            patterns.extend({"urlPattern": url, "requestStage": "Request"} for url in TRACKER_PATTERNS)
+        else:
+            patterns.extend({"urlPattern": "*", "resourceType": kind, "requestStage": "Request"}
+                            for kind in BLOCK_TYPES[category])
+    return patterns
+
+
+def is_allowed(role, url):
+    """True if `url` matches one of the role's `allow` patterns."""
+    return any(fnmatchcase(url, pattern) for pattern in ROLES.get(role, {}).get("allow", []))
+
+
+def _intercept_requests(driver, role, patterns):
+    """Pause the requests matching `patterns` and fail those the role doesn't allow."""
+    devtools, connection = driver.start_devtools()
+    fetch = devtools.fetch
+
+    def on_paused(event):
+        url = event.request.url
+        try:
+            if is_allowed(role, url):
+                connection.execute(fetch.continue_request(event.request_id))
+            else:
+                connection.execute(fetch.fail_request(event.request_id, devtools.network.ErrorReason.BLOCKED_BY_CLIENT))
+        except Exception as e:  # The page may have navigated away in the meantime
+            log.debug("Could not resolve paused request %s: %s", url, e)
+
+    connection.add_callback(fetch.RequestPaused, on_paused)
+    connection.execute(fetch.enable(patterns=[fetch.RequestPattern.from_json(p) for p in patterns]))
+
+
+def _browser_name():
+    browser = config.browser[0] if isinstance(config.browser, (list, tuple)) else config.browser
+    return (browser or "Chrome").lower()
+
+
+def build_options(role, headless=None):
+    """
+    Build the browser options for `role`.
+
+    Args:
+        role: One of ROLES.
+        headless: Override for headless mode; defaults to the role's setting or config.headless.
+    """
+    if headless is None:
+        headless = ROLES.get(role, {}).get("headless")
+    if headless is None:
+        headless = config.headless
+
+    from selenium import webdriver  # Imported here so importing this module stays cheap
+
+    lean = config.leanBrowser
+
+    if _browser_name() == "firefox":
+        options = webdriver.FirefoxOptions()
+        if headless:
+            options.add_argument("-headless")
+        options.set_preference("general.useragent.override", USER_AGENT)
+        if lean:
+            options.page_load_strategy = "eager"
+            if "images" in ROLES.get(role, {}).get("block", []):
+                options.set_preference("permissions.default.image", 2)
+        return options
+
+    options = webdriver.EdgeOptions() if _browser_name() == "edge" else webdriver.ChromeOptions()
+    if lean:
+        options.page_load_strategy = "eager"  # Return once the DOM is ready, not after every subresource
+    if headless:
+        options.add_argument("--headless=new")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument(f"user-agent={USER_AGENT}")
+    return options
+
+
+def create_driver(role, headless=None):
+    """Start a new WebDriver configured for `role`."""
+    from selenium import webdriver
+
+    options = build_options(role, headless)
+    browser = _browser_name()
+    if browser == "firefox":
+        return webdriver.Firefox(options=options)
+    driver = webdriver.Edge(options=options) if browser == "edge" else webdriver.Chrome(options=options)
+    if config.leanBrowser:
+        patterns = blocked_request_patterns(role)
+        if patterns:
+            try:
+                _intercept_requests(driver, role, patterns)
+            except Exception as e:  # E.g. a remote driver without CDP access; pages still load, just fully
+                log.warning("Could not set up request blocking for %s: %s", role, e)
+    return driver
+
+
+class PooledDriver:
+    """WebDriver proxy that counts page loads so the pool can recycle it."""
+
+    def __init__(self, driver):
+        self._driver = driver
+        self.pages = 0
+
+    def get(self, url):
+        self.pages += 1
+        return self._driver.get(url)
+
+    def refresh(self):
+        self.pages += 1
+        return self._driver.refresh()
+
+    @property
+    def wrapped(self):
+        """The underlying WebDriver."""
+        return self._driver
+
+    def __getattr__(self, name):
+        return getattr(self._driver, name)
+
+
+class BrowserPool:
+    """
+    A fixed-size pool of warm drivers for one role.
+
+    Args:
+        role: One of ROLES.
+        size: Number of drivers kept; defaults to the role's pool_size.
+        max_pages: Page loads after which a driver is replaced.
+        warm: Start all drivers up front instead of on first use.
+    """
+
+    def __init__(self, role, size=None, max_pages=DEFAULT_MAX_PAGES, warm=False):
+        self.role = role
+        self.size = size or ROLES.get(role, {}).get("pool_size", 1)
+        self.max_pages = max_pages
+        self._idle = queue.LifoQueue()  # Most recently used first, so the warmest driver is reused
+        self._lock = threading.Lock()
+        self._created = 0
+        self._closed = False
+        if warm:
+            self._created = self.size
+            for _ in range(self.size):
+                self._idle.put(self._new_driver())
+
+    def _new_driver(self):
+        """Start a driver for a slot already counted in self._created."""
+        log.debug("Starting %s browser...", self.role)
+        try:
+            return PooledDriver(create_driver(self.role))
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+
+    def _discard(self, driver):
+        with self._lock:
+            self._created -= 1
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    @staticmethod
+    def is_healthy(driver):
+        """True if the browser still responds to commands."""
+        try:
+            driver.execute_script("return 1")
+            return bool(driver.window_handles)
+        except Exception:
+            return False
+
+    def acquire(self, timeout=None):
+        """
+        Hand out a healthy driver, starting one if the pool has room.
+
+        Blocks until a driver is released when all `size` drivers are in use.
+        """
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    can_create = self._created < self.size
+                    if can_create:
+                        self._created += 1
+                if can_create:
+                    return self._new_driver()
+                driver = self._idle.get(timeout=timeout)
+
+            if self.is_healthy(driver):
+                return driver
+            log.warning("Replacing unresponsive %s browser.", self.role)
+            self._discard(driver)
+
+    def release(self, driver):
+        """Return a driver to the pool, recycling it once it has loaded max_pages pages."""
+        if self._closed:
+            self._discard(driver)
+            return
+        if driver.pages >= self.max_pages:
+            log.info("Recycling %s browser after %d pages.", self.role, driver.pages)
+            self._discard(driver)
+            return
+        self._idle.put(driver)
+
+    @contextmanager
+    def driver(self):
+        """Context manager that acquires a driver and releases it afterwards."""
+        driver = self.acquire()
+        try:
+            yield driver
+        finally:
+            self.release(driver)
+
+    def close(self):
+        """Quit every idle driver; drivers still checked out are quit on release."""
+        self._closed = True
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(role, **kwargs):
+    """Return the process-wide pool for `role`, creating it on first use."""
+    with _pools_lock:
+        if role not in _pools:
+            _pools[role] = BrowserPool(role, **kwargs)
+        return _pools[role]
+
+
+@atexit.register
+def close_all_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
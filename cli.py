@@ -0,0 +1,172 @@
+"""Command line entry point for the job bot.
+
+    python cli.py scrape [--portal URL] [--keyword K] [--location L] [--budget N] [--record FILE]
+    python cli.py replay [--archive FILE] [--portal URL] [--limit N]
+    python cli.py apply [--workers N] [--watch]
+    python cli.py linkedin [--file job_urls.txt | --queue]
+    python cli.py status
+    python cli.py report [--days N] [--export FILE.parquet|FILE.arrow] [--linkedin] [--migrate]
+
+Each subcommand imports what it needs only when it runs, so `--help` and
+`status` start without loading Selenium, the parsers or the OpenAI client.
+"""
+import argparse
+import sys
+
+
+def cmd_scrape(args):
+    import config
+    import scraper
+    from search_planner import plan_searches, run_searches
+
+    if args.record:
+        config.pageArchive = args.record
+    queries = plan_searches(
+        [args.portal] if args.portal else None,
+        [args.keyword] if args.keyword else None,
+        [args.location] if args.location is not None else None,
+        args.budget,
+    )
+    results = run_searches(queries, scraper.scrape_jobs)
+    print(f"Stored {sum(len(jobs) for jobs in results.values())} new jobs from {len(queries)} searches.")
+
+
+def cmd_replay(args):
+    import scraper
+    from page_archive import PageArchive
+
+    archive = PageArchive(args.archive)
+    print(f"Archive {args.archive}: {archive.stats()}")
+    jobs = scraper.replay_jobs(archive, args.portal, args.limit)
+    print(f"Re-analysed and stored {len(jobs)} jobs.")
+
+
+def cmd_apply(args):
+    import applier
+    applier.main(args.workers, args.watch)
+
+
+def cmd_linkedin(args):
+    import linkedin
+    from url_ingest import FileUrlSource, MongoUrlQueue
+
+    if args.queue:
+        source = MongoUrlQueue(linkedin.url_queue)
+    else:
+        source = FileUrlSource(args.file, linkedin.checkpoint_collection)
+    linkedin.Linkedin(source)
+
+
+def cmd_status(args):
+    import config
+    import quotas
+    from clients import get_mongo_client
+
+    client = get_mongo_client()
+    jobs_db = client["job_scraper"]
+    jobs = jobs_db["processeng_jobs"]
+    quota_collection = jobs_db["quotas"]
+
+    print(f"Scrapes this month:       {quotas.used(quota_collection, 'scrape')}/{config.monthlyScrapeLimit}")
+    print(f"Applications this week:   {quotas.used(quota_collection, 'apply')}/{config.weeklyApplicationLimit}")
+    print(f"Jobs stored:              {jobs.estimated_document_count()}")
+    print(f"Waiting to apply:         {jobs.count_documents({'Apply': 'Y', 'Applied': False})}")
+    print(f"Applied:                  {jobs.count_documents({'Applied': True})}")
+
+    state = jobs_db["scheduler_state"].find_one({"_id": "scheduler"})
+    if state:
+        print(f"Scheduler heartbeat:      {state.get('heartbeat')}")
+        for task in ("scrape", "apply"):
+            print(f"Next {task + ':':20s} {state.get(f'next_{task}_at')} ({state.get(f'last_{task}_result')})")
+
+    queue = client["linkedin_bot"]["url_queue"]
+    pending = queue.count_documents({"status": {"$in": ["pending", "processing"]}})
+    if pending:
+        print(f"LinkedIn URLs queued:     {pending}")
+
+
+def _print_rows(title, rows):
+    print(f"\n{title}")
+    if not rows:
+        print("  (none)")
+    for row in rows:
+        label = row.pop("_id")
+        values = ", ".join(f"{key} {value:.2f}" if isinstance(value, float) else f"{key} {value}"
+                           for key, value in row.items())
+        print(f"  {str(label):30s} {values}")
+
+
+def cmd_report(args):
+    import reports
+    from clients import get_mongo_client
+
+    client = get_mongo_client()
+    jobs = client["job_scraper"]["processeng_jobs"]
+    applications = client["linkedin_bot"]["applications"]
+    reports.ensure_indexes(jobs, applications)
+
+    if args.migrate:
+        print(f"Converted {reports.migrate_application_timestamps(applications)} LinkedIn timestamps to dates.")
+
+    since = reports.window_start(args.days)
+    if args.export:
+        collection, schema, field = ((applications, reports.application_schema(), "timestamp") if args.linkedin
+                                     else (jobs, reports.job_schema(), "Inserted At"))
+        written = reports.export(collection, args.export, schema, {field: {"$gte": since}})
+        print(f"Exported {written} documents to {args.export}.")
+        return
+
+    print(f"Last {args.days} days (since {since:%Y-%m-%d %H:%M} UTC)")
+    _print_rows("Applied per portal", reports.applied_per_portal(jobs, since))
+    _print_rows("Apply success rate", reports.apply_success_rate(jobs, since))
+    _print_rows("LLM yes-rate by keyword", reports.yes_rate_by_keyword(jobs, since))
+    _print_rows("LinkedIn results", reports.linkedin_outcomes(applications, since))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="Scrape, analyse and apply to jobs.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    scrape = subparsers.add_parser("scrape", help="Run the configured searches (or one given here)")
+    scrape.add_argument("--portal", help="Portal base URL; defaults to careerPortals in config.py")
+    scrape.add_argument("--keyword", help="Search keyword; defaults to keywords in config.py")
+    scrape.add_argument("--location", help="Search location; defaults to location in config.py")
+    scrape.add_argument("--budget", type=int, help="New jobs per search; defaults to searchBudget")
+    scrape.add_argument("--record", metavar="FILE", help="Save every fetched page to this page archive")
+    scrape.set_defaults(func=cmd_scrape)
+
+    replay = subparsers.add_parser("replay", help="Re-parse and re-analyse recorded pages without crawling")
+    replay.add_argument("--archive", default="page_archive.db", help="Page archive recorded by scrape --record")
+    replay.add_argument("--portal", help="Only replay pages whose URL starts with this")
+    replay.add_argument("--limit", type=int, help="Stop after this many jobs")
+    replay.set_defaults(func=cmd_replay)
+
+    apply = subparsers.add_parser("apply", help="Apply to jobs marked as suitable")
+    apply.add_argument("--workers", type=int, default=1, help="Number of parallel browser workers")
+    apply.add_argument("--watch", action="store_true", help="Keep running and apply to new jobs as they arrive")
+    apply.set_defaults(func=cmd_apply)
+
+    linkedin = subparsers.add_parser("linkedin", help="Screen and Easy Apply to LinkedIn job URLs")
+    linkedin.add_argument("--file", default="job_urls.txt", help="Text file with one job URL per line")
+    linkedin.add_argument("--queue", action="store_true", help="Read URLs from the url_queue collection")
+    linkedin.set_defaults(func=cmd_linkedin)
+
+    status = subparsers.add_parser("status", help="Show quota usage, job counts and the schedule")
+    status.set_defaults(func=cmd_status)
+
+    report = subparsers.add_parser("report", help="Application and analysis statistics, or a columnar export")
+    report.add_argument("--days", type=int, default=7, help="Report on the last N days")
+    report.add_argument("--export", metavar="FILE", help="Write the window to FILE.parquet or FILE.arrow instead")
+    report.add_argument("--linkedin", action="store_true", help="Export LinkedIn results instead of portal jobs")
+    report.add_argument("--migrate", action="store_true", help="First convert old string timestamps to dates")
+    report.set_defaults(func=cmd_report)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""Shared MongoDB and OpenAI clients, created on first use.
+
+Modules declare the collections they need with `lazy_database()` at
+import time, which costs nothing: the MongoClient is only built, and the
+TLS connection only opened, when a collection is first used. Every module
+gets the same client per URI, so a process holds one connection pool
+however many modules it imports. `get_openai_client()` does the same for
+the OpenAI API and defers importing the `openai` package.
+"""
+import os
+import threading
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+_lock = threading.Lock()
+_mongo_clients = {}
+_openai_clients = {}
+
+
+def get_mongo_client(uri=None):
+    """The process-wide MongoClient for `uri` (default MONGO_URI), created on first call."""
+    uri = uri or os.getenv("MONGO_URI")
+    with _lock:
+        if uri not in _mongo_clients:
+            from pymongo import MongoClient
+            _mongo_clients[uri] = MongoClient(uri, tls=True, tlsAllowInvalidCertificates=True)
+        return _mongo_clients[uri]
+
+
+def get_openai_client(base_url=None):
+    """The process-wide OpenAI client for `base_url` (default OPENAI_BASE_URL), created on first call."""
+    base_url = base_url or os.getenv("OPENAI_BASE_URL")
+    with _lock:
+        if base_url not in _openai_clients:
+            from openai import OpenAI
+            _openai_clients[base_url] = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), base_url=base_url)
+        return _openai_clients[base_url]
+
+
+class LazyCollection:
+    """Stands in for a pymongo Collection and resolves it on first attribute access."""
+
+    def __init__(self, database, name):
+        self._database = database
+        self._name = name
+        self._collection = None
+
+    def _resolve(self):
+        if self._collection is None:
+            self._collection = get_mongo_client()[self._database][self._name]
+        return self._collection
+
+    def __getattr__(self, attribute):
+        return getattr(self._resolve(), attribute)
+
+    def __repr__(self):
+        return f"LazyCollection({self._database!r}, {self._name!r})"
+
+
+class LazyDatabase:
+    """Stands in for a pymongo Database; `db[name]` returns a LazyCollection."""
+
+    def __init__(self, name):
+        self._name = name
+
+    def __getitem__(self, name):
+        return LazyCollection(self._name, name)
+
+    def __getattr__(self, attribute):
+        return getattr(get_mongo_client()[self._name], attribute)
+
+
+def lazy_database(name):
+    return LazyDatabase(name)
+
+
+def close_all():
+    """Close every client created so far."""
+    with _lock:
+        for client in _mongo_clients.values():
+            client.close()
+        _mongo_clients.clear()
+        for client in _openai_clients.values():
+            client.close()
+        _openai_clients.clear()
@@ -3,6 +3,15 @@
 # Browser Settings
 browser = ["Chrome"]          # Use Chrome as default
 headless = False              # Set to True to run in the background
+leanBrowser = True            # Block images, fonts, trackers (and CSS where safe) and load pages eagerly
+
+# Career Portals (scraper.py)
+careerPortals = ["link to website"]              # Base URLs of the careers portals to search
+portalConcurrency = 2                            # Searches run at once against one portal
+searchBudget = 20                                # New jobs stored per search (keyword x location) per run
+monthlyScrapeLimit = 20                          # New jobs stored per calendar month by scheduler.py
+scrapeInterval = 6 * 3600                        # Seconds between scrape cycles while quota is left
+applyPollInterval = 15 * 60                      # Seconds between looks for new jobs to apply to
 
 # Job Search Filters
 location = ["North America"]                     # Locations for the job search
@@ -20,9 +29,27 @@ blackListTitles = ["Intern", "Junior"]           # Skip these job titles
 onlyApplyCompanies = []                          # Apply only to these companies
 onlyApplyTitles = []                             # Apply only to these job titles
 
+# Pre-filter
+prefilterThreshold = 0.05                        # Min resume similarity (0-1) before a job is sent to the LLM
+
+# LLM Analysis
+llmModel = "gpt-4o"                              # Chat model used to judge postings
+llmBatchSize = 5                                 # Postings packed into one request
+llmConcurrency = 4                               # Requests in flight at once
+llmRequestsPerMinute = 500                       # RPM limit of the API key
+llmTokensPerMinute = 30000                       # TPM limit of the API key
+
 # Job Application Settings
+weeklyApplicationLimit = 5                       # Applications per calendar week, across all workers
 followCompanies = False                          # Follow companies after applying
 preferredCv = 1                                  # Use the first uploaded resume
 
 # Debugging & Testing
 displayWarnings = True                           # Show warnings in the console
+logLevel = "INFO"                                # DEBUG, INFO, WARNING or ERROR (LOG_LEVEL env overrides)
+logSampleRate = 0.1                              # Share of jobs whose per-job debug/info lines are logged
+traceFile = "traces.jsonl"                       # JSON lines of timed spans; None disables
+traceMaxBytes = 50 * 1024 * 1024                 # Rotate traceFile to traceFile.1 at this size
+metricsFile = "metrics.prom"                     # Prometheus text metrics written at exit; None disables
+metricsPort = 9108                               # Port used by tracing.serve_metrics()
+pageArchive = None                               # SQLite file every fetched page is recorded to, e.g. "page_archive.db"; None disables
@@ -0,0 +1,165 @@
+"""Compressed, content-addressed job descriptions with near-duplicate detection.
+
+Every fetched description is stored once in the `job_descriptions`
+collection, compressed with zstd when the `zstandard` package is installed
+and zlib otherwise, under the SHA-256 of its normalised text. Jobs only keep
+that hash (`Description Hash`), so a posting can be re-analysed later
+without crawling it again.
+
+Each description also gets a MinHash signature of its title and text
+shingles, split into LSH bands that are indexed in MongoDB. A repost or
+cross-post under a new job ID shares most bands with the original, so one
+indexed lookup finds it; if the estimated similarity is above `threshold`
+and the original was already judged for the same profile and model, its
+verdict is reused instead of calling the LLM.
+"""
+import hashlib
+import re
+import threading
+import zlib
+from datetime import datetime, timezone
+
+import numpy as np
+from bson import Binary
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional; zlib is always available
+    zstandard = None
+
+NUM_PERM = 64
+BANDS = 16                # 16 bands of 4 rows: pairs above ~0.5 similarity become candidates
+ROWS = NUM_PERM // BANDS
+SHINGLE_WORDS = 3
+DEFAULT_THRESHOLD = 0.8   # Estimated Jaccard similarity at which a verdict is reused
+_PRIME = (1 << 31) - 1
+
+_rng = np.random.default_rng(20241)  # Fixed seed: signatures must be comparable across runs
+_A = _rng.integers(1, _PRIME, NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, _PRIME, NUM_PERM, dtype=np.uint64)
+
+
+def _normalise(text):
+    return re.sub(r"\s+", " ", (text or "")).strip().lower()
+
+
+def content_hash(description):
+    """SHA-256 of the normalised description; the key it is stored under."""
+    return hashlib.sha256(_normalise(description).encode("utf-8")).hexdigest()
+
+
+def compress(text):
+    """Return (codec, compressed bytes) for `text`."""
+    data = text.encode("utf-8")
+    if zstandard is not None:
+        return "zstd", zstandard.ZstdCompressor(level=10).compress(data)
+    return "zlib", zlib.compress(data, 9)
+
+
+def decompress(codec, data):
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Description was stored with zstd; install the zstandard package to read it")
+        return zstandard.ZstdDecompressor().decompress(data).decode("utf-8")
+    return zlib.decompress(data).decode("utf-8")
+
+
+def minhash(title, description):
+    """MinHash signature (NUM_PERM ints) of the word shingles of title and description."""
+    words = re.findall(r"\w+", f"{title} {description}".lower())
+    if len(words) < SHINGLE_WORDS:
+        words = words + [""] * (SHINGLE_WORDS - len(words))
+    shingles = {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+    hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+    # (a * h + b) mod p for every permutation and shingle; fits in uint64 since a, b < 2^31 and h < 2^32
+    permuted = (np.outer(_A, hashes) + _B[:, None]) % _PRIME
+    return permuted.min(axis=1).tolist()
+
+
+def lsh_bands(signature):
+    """Band keys under which a signature is indexed."""
+    return [
+        f"{band}:" + hashlib.blake2b(repr(signature[band * ROWS:(band + 1) * ROWS]).encode(), digest_size=8).hexdigest()
+        for band in range(BANDS)
+    ]
+
+
+def similarity(signature, other):
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.mean(np.asarray(signature) == np.asarray(other)))
+
+
+class DescriptionStore:
+    """
+    Store descriptions once and look up already-judged near duplicates.
+
+    Args:
+        collection: MongoDB collection for descriptions.
+        profile_key: Identifies the profile and model verdicts were made for;
+            verdicts for another profile or model are never reused.
+        threshold: Minimum estimated similarity for a verdict to be reused.
+    """
+
+    def __init__(self, collection, profile_key, threshold=DEFAULT_THRESHOLD):
+        self.collection = collection
+        self.profile_key = profile_key
+        self.threshold = threshold
+        self.reused = 0
+        self._lock = threading.Lock()
+
+    def ensure_indexes(self):
+        self.collection.create_index("lsh")
+
+    def put(self, title, description, job_id=None):
+        """
+        Store `description` unless it is already stored.
+
+        Returns:
+            tuple: (content hash, MinHash signature)
+        """
+        key = content_hash(description)
+        signature = minhash(title, description)
+        codec, data = compress(description)
+        update = {"$setOnInsert": {"codec": codec, "data": Binary(data), "size": len(description),
+                                   "minhash": signature, "lsh": lsh_bands(signature),
+                                   "created_at": datetime.now(timezone.utc)}}
+        if job_id is not None:
+            update["$addToSet"] = {"job_ids": job_id}
+        self.collection.update_one({"_id": key}, update, upsert=True)
+        return key, signature
+
+    def find_judged(self, signature):
+        """
+        Find an already-judged description similar to `signature`.
+
+        Returns:
+            dict: The stored `analysis` (verdict, score, rationale, job_id) and
+            its `similarity`, or None if there is no close enough match.
+        """
+        candidates = self.collection.find(
+            {"lsh": {"$in": lsh_bands(signature)}, "analysis.profile_key": self.profile_key},
+            {"minhash": 1, "analysis": 1},
+        )
+        best, best_similarity = None, self.threshold
+        for doc in candidates:
+            score = similarity(signature, doc["minhash"])
+            if score >= best_similarity:
+                best, best_similarity = doc, score
+        if best is None:
+            return None
+        return dict(best["analysis"], similarity=best_similarity)
+
+    def count_reuse(self):
+        """Record that a verdict from `find_judged` was reused for another posting."""
+        with self._lock:
+            self.reused += 1
+
+    def record_analysis(self, key, job_id, analysis):
+        """Attach the LLM verdict for the description stored under `key`."""
+        self.collection.update_one({"_id": key}, {"$set": {"analysis": {
+            "profile_key": self.profile_key,
+            "job_id": job_id,
+            "verdict": analysis["verdict"],
+            "score": analysis["score"],
+            "rationale": analysis["rationale"],
+        }}})
@@ -0,0 +1,118 @@
+"""HTTP-first page fetching with Selenium as a fallback.
+
+Career portals like the one `scraper.py` targets render their result tables
+and job descriptions on the server, so a pooled keep-alive HTTP session is
+enough for most pages. A WebDriver is only borrowed when a page turns out to
+need JavaScript (none of the expected markers are in the raw HTML).
+The fetcher can be shared between threads; browser fallbacks are serialised
+because a WebDriver only drives one page at a time. Given a `PageArchive`,
+every page it returns is also recorded there.
+"""
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from browser_pool import USER_AGENT, get_pool
+from tracing import get_logger, span
+from waits import wait_for, dom_ready
+
+HTTP_TIMEOUT = 15
+POOL_SIZE = 10
+log = get_logger("fetcher")
+
+
+def create_session(pool_size=POOL_SIZE):
+    """Create a keep-alive HTTP session with a connection pool and retries."""
+    session = requests.Session()
+    retries = Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504))
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retries)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"User-Agent": USER_AGENT})
+    return session
+
+
+class PageFetcher:
+    """Fetch pages over HTTP and fall back to a WebDriver borrowed from the browser pool."""
+
+    def __init__(self, use_http=True, session=None, pool=None, archive=None):
+        self.use_http = use_http
+        self.archive = archive
+        self.session = session if session is not None else (create_session() if use_http else None)
+        self.pool = pool if pool is not None else get_pool("scraper")
+        self._driver = None
+        self.driver_lock = threading.RLock()
+        self.http_pages = 0
+        self.browser_pages = 0
+
+    @property
+    def driver(self):
+        """The fallback WebDriver, borrowed from the pool on first use."""
+        with self.driver_lock:
+            if self._driver is None:
+                self._driver = self.pool.acquire()
+            return self._driver
+
+    def record(self, url, html, step):
+        """Save a fetched page to the archive, if recording."""
+        if self.archive is not None and html:
+            self.archive.record(url, step, html)
+
+    def fetch_http(self, url, markers):
+        """
+        Fetch `url` over HTTP.
+
+        Args:
+            url: Page to fetch.
+            markers: Substrings of which at least one must be in the server HTML.
+
+        Returns:
+            str: The HTML, or None if the request failed or the page needs JavaScript.
+        """
+        if not self.use_http:
+            return None
+        try:
+            response = self.session.get(url, timeout=HTTP_TIMEOUT)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            log.info("HTTP fetch failed for %s: %s", url, e)
+            return None
+        html = response.text
+        if not any(marker in html for marker in markers):
+            return None
+        self.http_pages += 1
+        return html
+
+    def get(self, url, markers, ready_condition=dom_ready, step="page_load"):
+        """
+        Return the HTML for `url`, using HTTP when possible and WebDriver otherwise.
+
+        Args:
+            url: Page to fetch.
+            markers: Substrings that show the server HTML has the content we need.
+            ready_condition: Wait condition for the WebDriver fallback.
+            step: Step name used for wait timings and the page_load span.
+        """
+        with span("page_load", step=step, url=url) as page_span:
+            html = self.fetch_http(url, markers)
+            if html is not None:
+                page_span.tag(via="http")
+            else:
+                page_span.tag(via="browser")
+                with self.driver_lock:
+                    self.driver.get(url)
+                    wait_for(self.driver, ready_condition, step)
+                    self.browser_pages += 1
+                    html = self.driver.page_source
+        self.record(url, html, step)
+        return html
+
+    def close(self):
+        """Close the HTTP session and return the WebDriver to the pool if one was borrowed."""
+        if self.session is not None:
+            self.session.close()
+        if self._driver is not None:
+            self.pool.release(self._driver)
+            self._driver = None
+        log.info("Pages fetched: %d over HTTP, %d with WebDriver", self.http_pages, self.browser_pages)
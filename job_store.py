@@ -0,0 +1,268 @@
+"""Batched reads and buffered bulk writes for the `processeng_jobs` collection.
+
+Deduplication runs as one `$in` query per results page, backed by a unique
+index on `Job ID`, plus an in-memory `SeenJobIds` shared by the searches of
+one run so a posting found by several queries is only processed once. New
+jobs are buffered and written with `bulk_write` upserts that flush when the
+buffer is full or after `flush_interval` seconds. A duplicate-key conflict
+means another writer got there first, so it is counted as "already seen"
+rather than raised; a write that fails outright (e.g. the connection
+dropped) keeps its jobs buffered for the next flush.
+
+Every job gets an `Inserted At` time when it is first written, which apply
+workers in watch mode use to find new jobs (see `job_watch`).
+
+Apply workers claim jobs atomically with `find_one_and_update`: a claim
+marks the job in progress with a lease expiry, and a job whose lease has
+run out (its worker crashed) can be claimed again. A failed attempt sets
+`Retry At`, and the job is not claimed again before then.
+"""
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from tracing import get_logger, span
+
+DUPLICATE_KEY = 11000
+CLAIM_LEASE = timedelta(minutes=10)
+MAX_APPLY_ATTEMPTS = 3
+RETRY_BACKOFF = timedelta(minutes=30)  # Wait before a failed job may be claimed again; doubles per attempt
+CLOSE_RETRIES = 3  # Final flush attempts, with exponential backoff, before buffered jobs are given up on
+SKIP_VERDICT_FIELDS = ("Apply", "AI Analysis")  # What a skip writes in place of an LLM verdict
+log = get_logger("job_store")
+
+
+def ensure_indexes(collection):
+    """Create the unique `Job ID` index and the indexes behind apply claims and watching."""
+    collection.create_index("Job ID", unique=True)
+    collection.create_index([("Apply", 1), ("Applied", 1), ("Claim.expires", 1)])
+    collection.create_index([("Apply", 1), ("Applied", 1), ("Inserted At", 1)])
+
+
+def find_known_job_ids(collection, job_ids):
+    """Return the subset of `job_ids` already stored, using a single `$in` query."""
+    job_ids = list(set(job_ids))
+    if not job_ids:
+        return set()
+    with span("mongo", op="find_known", jobs=len(job_ids)):
+        cursor = collection.find({"Job ID": {"$in": job_ids}}, {"Job ID": 1, "_id": 0})
+        return {doc["Job ID"] for doc in cursor}
+
+
+class SeenJobIds:
+    """Thread-safe set of job IDs handled in this run, shared by concurrent searches."""
+
+    def __init__(self):
+        self._ids = set()
+        self._lock = threading.Lock()
+
+    def claim(self, job_id):
+        """Mark `job_id` as handled; False if another search already claimed it."""
+        with self._lock:
+            if job_id in self._ids:
+                return False
+            self._ids.add(job_id)
+            return True
+
+    def known(self, job_ids):
+        """Return the subset of `job_ids` already claimed."""
+        with self._lock:
+            return self._ids.intersection(job_ids)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._ids)
+
+
+class BulkJobWriter:
+    """
+    Buffer job documents and write them as unordered bulk upserts.
+
+    Args:
+        collection: MongoDB collection to write to.
+        batch_size: Flush once this many jobs are buffered.
+        flush_interval: Flush buffered jobs at least this often, in seconds.
+        overwrite: Update jobs that are already stored (used by replays)
+            instead of leaving them untouched. `Applied` is never overwritten,
+            and a job skipped before the LLM (no `AI Score`) never replaces a
+            verdict that is already stored.
+    """
+
+    def __init__(self, collection, batch_size=50, flush_interval=5.0, overwrite=False):
+        self.collection = collection
+        self.overwrite = overwrite
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.inserted = 0
+        self.existing = 0
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._timer = threading.Thread(target=self._flush_periodically, daemon=True)
+        self._timer.start()
+
+    def add(self, job_data):
+        """Queue a job for insertion; it is written on the next flush."""
+        with self._lock:
+            self._buffer.append(job_data)
+            full = len(self._buffer) >= self.batch_size
+        if full:
+            self.flush()
+
+    def _flush_periodically(self):
+        while not self._closed.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                log.exception("Periodic flush failed; retrying on the next one.")
+
+    @property
+    def pending(self):
+        """Jobs buffered but not yet written."""
+        with self._lock:
+            return len(self._buffer)
+
+    def _update(self, job, now):
+        if not self.overwrite:
+            return {"$setOnInsert": {"Inserted At": now, **job}}
+        fields = {key: value for key, value in job.items() if key != "Applied"}
+        on_insert = {"Inserted At": now, "Applied": job.get("Applied", False)}
+        update = {"$set": fields, "$setOnInsert": on_insert}
+        if "AI Score" not in job:
+            # Skipped by the rules or pre-filter: only new jobs get the skip verdict
+            for key in SKIP_VERDICT_FIELDS:
+                if key in fields:
+                    on_insert[key] = fields.pop(key)
+        elif "Duplicate Of" not in job:
+            update["$unset"] = {"Duplicate Of": ""}  # Judged on its own this time
+        return update
+
+    def flush(self):
+        """
+        Write all buffered jobs in one `bulk_write` round trip.
+
+        If the write fails as a whole (connection lost, no server selected),
+        the jobs go back into the buffer for the next flush.
+
+        Returns:
+            bool: False if the jobs could not be written.
+        """
+        with self._lock:
+            batch, self._buffer = self._buffer, []
+        if not batch:
+            return True
+
+        now = datetime.now(timezone.utc)
+        requests = [
+            UpdateOne({"Job ID": job["Job ID"]}, self._update(job, now), upsert=True)
+            for job in batch
+        ]
+        failed = []
+        with span("mongo", op="bulk_write", jobs=len(batch)) as write_span:
+            try:
+                result = self.collection.bulk_write(requests, ordered=False)
+                inserted = result.upserted_count
+            except BulkWriteError as e:
+                details = e.details
+                failed = [err for err in details.get("writeErrors", []) if err.get("code") != DUPLICATE_KEY]
+                if failed:
+                    write_span.outcome = "partial"
+                    log.error("Bulk write failed for %d jobs: %s", len(failed), failed[0].get('errmsg'))
+                inserted = details.get("nUpserted", 0)
+            except PyMongoError as e:
+                write_span.outcome = "error"
+                log.warning("Bulk write of %d jobs failed (%s); keeping them for the next flush.", len(batch), e)
+                with self._lock:
+                    self._buffer[:0] = batch
+                return False
+
+        existing = len(batch) - inserted - len(failed)
+        with self._lock:
+            self.inserted += inserted
+            self.existing += existing
+        log.debug("Flushed %d jobs: %d inserted, %d already stored", len(batch), inserted, existing)
+        return True
+
+    def close(self):
+        """
+        Stop the flush timer and write anything still buffered, retrying with backoff.
+
+        Returns:
+            int: Jobs that could not be written.
+        """
+        self._closed.set()
+        self._timer.join()
+        for attempt in range(CLOSE_RETRIES):
+            if self.flush():
+                return 0
+            if attempt < CLOSE_RETRIES - 1:
+                time.sleep(2 ** attempt)
+        log.error("Gave up writing %d jobs.", self.pending)
+        return self.pending
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def claim_next_job(collection, worker_id, lease=CLAIM_LEASE):
+    """
+    Atomically claim the best-scored job the LLM said to apply for.
+
+    Args:
+        collection: Jobs collection.
+        worker_id: Identifier of the claiming worker (host and process).
+        lease: How long the claim holds before other workers may take the job.
+
+    Returns:
+        dict: The claimed job, or None if no job is eligible.
+    """
+    now = datetime.now(timezone.utc)
+    with span("mongo", op="claim") as claim_span:
+        job = collection.find_one_and_update(
+            {
+                "Apply": "Y",
+                "Applied": False,
+                "$and": [
+                    {"$or": [{"Claim": None}, {"Claim.expires": {"$lt": now}}]},
+                    {"$or": [{"Attempts": None}, {"Attempts": {"$lt": MAX_APPLY_ATTEMPTS}}]},
+                    {"$or": [{"Retry At": None}, {"Retry At": {"$lte": now}}]},
+                ],
+            },
+            {"$set": {"Status": "in_progress", "Claim": {"worker": worker_id, "expires": now + lease}}},
+            sort=[("AI Score", -1)],
+            return_document=ReturnDocument.AFTER,
+        )
+        if job is None:
+            claim_span.outcome = "empty"
+        return job
+
+
+def complete_claim(collection, job, worker_id, applied, count_attempt=True):
+    """
+    Release a claim, recording whether the application went through.
+
+    A failed attempt backs the job off for `RETRY_BACKOFF`, doubled for
+    every earlier attempt. With `count_attempt=False` (the failure had
+    nothing to do with the job, e.g. the login failed) the job is only
+    released.
+    """
+    now = datetime.now(timezone.utc)
+    if not count_attempt:
+        update = {"$unset": {"Claim": "", "Status": ""}}
+    elif applied:
+        update = {"$unset": {"Claim": ""}, "$inc": {"Attempts": 1},
+                  "$set": {"Applied": True, "Status": "applied", "Applied At": now, "Last Attempt At": now}}
+    else:
+        attempts = (job.get("Attempts") or 0) + 1
+        update = {"$unset": {"Claim": ""}, "$inc": {"Attempts": 1},
+                  "$set": {"Status": "failed", "Last Attempt At": now,
+                           "Retry At": now + RETRY_BACKOFF * 2 ** (attempts - 1)}}
+    # Only touch the job if the claim is still ours (the lease may have run out)
+    with span("mongo", op="complete_claim", job_id=job.get("Job ID")):
+        collection.update_one({"_id": job["_id"], "Claim.worker": worker_id}, update)
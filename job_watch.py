@@ -0,0 +1,136 @@
+"""Wake apply workers as soon as a job becomes eligible.
+
+`JobWatcher.wait()` blocks until a job with `Apply: "Y"` and
+`Applied: False` is inserted (or updated into that state). It subscribes to
+a MongoDB change stream on the jobs collection; deployments without change
+streams (standalone servers) fall back to polling the
+`(Apply, Applied, Inserted At)` index for jobs newer than the last one seen.
+The change stream's resume token, or the polling position, is persisted in
+`watch_state`, so a restarted worker continues from where it stopped.
+
+Events only wake the worker up; which job gets applied to is still decided
+by the atomic claims in `job_store`.
+"""
+import time
+from datetime import datetime, timezone
+
+from pymongo.errors import PyMongoError
+
+from tracing import get_logger
+
+log = get_logger("job_watch")
+
+ELIGIBLE = {"Apply": "Y", "Applied": False}
+AWAIT_MS = 1000  # How long one change stream poll blocks on the server
+
+# Inserts of eligible jobs, and updates that touch Apply/Applied and leave the job eligible
+CHANGE_PIPELINE = [{"$match": {
+    "fullDocument.Apply": "Y",
+    "fullDocument.Applied": False,
+    "$or": [
+        {"operationType": {"$in": ["insert", "replace"]}},
+        {"updateDescription.updatedFields.Apply": {"$exists": True}},
+        {"updateDescription.updatedFields.Applied": {"$exists": True}},
+    ],
+}}]
+
+
+class JobWatcher:
+    """
+    Wait for newly eligible jobs via a change stream, or indexed polling as a fallback.
+
+    Args:
+        collection: Jobs collection.
+        state_collection: Where the resume token / polling position is kept.
+        name: State document ID, one per kind of watcher.
+        poll_interval: Seconds between polls in fallback mode.
+    """
+
+    def __init__(self, collection, state_collection, name="applier", poll_interval=10):
+        self.collection = collection
+        self.state_collection = state_collection
+        self.name = name
+        self.poll_interval = poll_interval
+        state = state_collection.find_one({"_id": name}) or {}
+        self.resume_token = state.get("resume_token")
+        self.last_inserted_at = state.get("last_inserted_at")
+        self._stream = None
+        self.mode = "change_stream"
+
+    def _save(self):
+        self.state_collection.update_one(
+            {"_id": self.name},
+            {"$set": {"resume_token": self.resume_token, "last_inserted_at": self.last_inserted_at,
+                      "mode": self.mode, "updated_at": datetime.now(timezone.utc)}},
+            upsert=True,
+        )
+
+    def _open_stream(self):
+        try:
+            self._stream = self.collection.watch(CHANGE_PIPELINE, full_document="updateLookup",
+                                                 resume_after=self.resume_token, max_await_time_ms=AWAIT_MS)
+        except PyMongoError as e:
+            if self.resume_token is not None:
+                # The token may have fallen off the oplog; start a fresh stream before giving up
+                log.warning("Could not resume change stream (%s); starting a new one.", e)
+                self.resume_token = None
+                return self._open_stream()
+            log.info("Change streams unavailable (%s); polling for new jobs instead.", e)
+            self.mode = "poll"
+            if self.last_inserted_at is None:
+                self.last_inserted_at = self._newest_eligible()
+
+    def _newest_eligible(self):
+        newest = self.collection.find_one(ELIGIBLE, {"Inserted At": 1}, sort=[("Inserted At", -1)])
+        return newest.get("Inserted At") if newest else None
+
+    def _wait_stream(self, deadline):
+        try:
+            while time.monotonic() < deadline and self._stream.alive:
+                change = self._stream.try_next()
+                token = self._stream.resume_token
+                if change is not None:
+                    self.resume_token = token
+                    self._save()
+                    log.info("Job %s became eligible.", change["fullDocument"].get("Job ID"))
+                    return True
+        except PyMongoError as e:
+            log.warning("Change stream interrupted (%s); reopening.", e)
+            self._stream.close()
+        if not self._stream.alive:
+            self._stream = None  # Reopened, from the saved resume token, on the next wait
+        return False
+
+    def _wait_poll(self, deadline):
+        while True:
+            query = dict(ELIGIBLE)
+            if self.last_inserted_at is not None:
+                query["Inserted At"] = {"$gt": self.last_inserted_at}
+            newest = self.collection.find_one(query, {"Inserted At": 1}, sort=[("Inserted At", -1)])
+            if newest is not None and newest.get("Inserted At") is not None:
+                self.last_inserted_at = newest["Inserted At"]
+                self._save()
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(self.poll_interval, remaining))
+
+    def wait(self, timeout):
+        """
+        Block until a newly eligible job appears or `timeout` seconds pass.
+
+        Returns:
+            bool: True if a new eligible job was seen.
+        """
+        deadline = time.monotonic() + timeout
+        if self.mode == "change_stream" and self._stream is None:
+            self._open_stream()
+        if self.mode == "change_stream":
+            return self._wait_stream(deadline)
+        return self._wait_poll(deadline)
+
+    def close(self):
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
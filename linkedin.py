@@ -1,152 +1,163 @@
-import time
-import math
-import random
 import os
-import pickle
-import hashlib
-from dotenv import load_dotenv
-from pymongo import MongoClient
-from selenium import webdriver
+from datetime import datetime, timezone
+import argparse
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service as ChromeService
-import openai
-
-# Load environment variables
-load_dotenv()
-
-# MongoDB connection
-mongo_uri = os.getenv("MONGO_URI")
-mongo_client = MongoClient(mongo_uri)
-db = mongo_client["linkedin_bot"]
+from browser_pool import get_pool
+from session_store import get_session_store
+from clients import lazy_database
+from llm_client import create_analysis_client
+from prefilter import ResumeScorer, screen_job
+from tracing import get_logger, job_log, span
+from url_ingest import FileUrlSource, MongoUrlQueue, ResultWriter, iter_unhandled, linkedin_job_id
+from waits import wait_for, dom_ready, selector_present, url_changed, all_of, any_of, log_timing_summary
+
+# MongoDB connection, opened on first use (environment variables are loaded by clients.py)
+db = lazy_database("linkedin_bot")
 applications_collection = db["applications"]
+checkpoint_collection = db["ingest_checkpoints"]
+url_queue = db["url_queue"]
+log = get_logger("linkedin")
 
-# OpenAI API Key
-openai.api_key = os.getenv("OPENAI_API_KEY")
+PROFILE_SUMMARY = """- Experienced Process Engineer.
+- Expertise in optimization and hydroprocessing.
+- Proficient in Python and Power BI."""
 
 class Linkedin:
-    def __init__(self):
-        # Set up Chrome options
-        self.driver = webdriver.Chrome(options=self.chrome_browser_options())
+    def __init__(self, source=None):
+        # Borrow a warm browser; options are set up in browser_pool
+        self.pool = get_pool("linkedin")
+        self.driver = self.pool.acquire()
+        self.analysis_client = create_analysis_client(PROFILE_SUMMARY)
+        self.resume_scorer = ResumeScorer(PROFILE_SUMMARY)
         
-        # Start LinkedIn automation
-        self.cookies_path = f"{os.path.join(os.getcwd(), 'cookies')}/{self.get_hash('YourEmail@example.com')}.pkl"
-        self.driver.get("https://www.linkedin.com")
-        self.load_cookies()
+        # Start LinkedIn automation; the session is judged by the li_at cookie's expiry
+        self.session = get_session_store("linkedin", os.getenv("LINKEDIN_EMAIL"), required_cookies=("li_at",))
 
         if not self.is_logged_in():
             self.driver.get("https://www.linkedin.com/login")
-            print("🔄 Logging in to LinkedIn...")
+            log.info("🔄 Logging in to LinkedIn...")
             self.login()
 
-        self.link_job_apply()
-
-    def chrome_browser_options(self):
-        options = webdriver.ChromeOptions()
-        options.add_argument("--disable-gpu")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--window-size=1920,1080")
-        # Uncomment the next line to enable headless mode
-        # options.add_argument("--headless")
-        return options
+        try:
+            self.link_job_apply(source)
+        finally:
+            self.pool.release(self.driver)
     
-    def get_hash(self, string):
-        return hashlib.md5(string.encode('utf-8')).hexdigest()
-
-    def load_cookies(self):
-        if os.path.exists(self.cookies_path):
-            cookies = pickle.load(open(self.cookies_path, "rb"))
-            self.driver.delete_all_cookies()
-            for cookie in cookies:
-                self.driver.add_cookie(cookie)
-
-    def save_cookies(self):
-        pickle.dump(self.driver.get_cookies(), open(self.cookies_path, "wb"))
-
     def is_logged_in(self):
-        self.driver.get('https://www.linkedin.com/feed')
-        try:
-            self.driver.find_element(By.XPATH, '//*[@id="global-nav-typeahead"]')
-            return True
-        except:
-            return False
+        """Restore the stored session if its cookies are still valid; no feed page load needed."""
+        return self.session.apply(self.driver, "https://www.linkedin.com")
 
     def login(self):
         try:
             self.driver.find_element("id", "username").send_keys(os.getenv("LINKEDIN_EMAIL"))
             self.driver.find_element("id", "password").send_keys(os.getenv("LINKEDIN_PASSWORD"))
+            login_url = self.driver.current_url
             self.driver.find_element(By.XPATH, '//button[@type="submit"]').click()
-            time.sleep(5)
-            self.save_cookies()
+            wait_for(self.driver, any_of(url_changed(login_url), selector_present("#global-nav-typeahead")),
+                     "linkedin_login")
+            self.session.save(self.driver)
         except Exception as e:
-            print(f"❌ Login failed: {e}")
+            log.error("❌ Login failed: %s", e)
 
     def analyze_job_with_ai(self, job_title, job_description):
-        """Analyze the job description using OpenAI GPT."""
-        prompt = f"""
-        Analyze the following job posting:
-        Job Title: {job_title}
-        Job Description: {job_description}
-        
-        Determine if this job is suitable for someone with the following profile:
-        - Experienced Process Engineer.
-        - Expertise in optimization and hydroprocessing.
-        - Proficient in Python and Power BI.
-        
-        Provide a summary in one paragraph starting with "Yes" or "No".
-        """
+        """Analyze the job description with the shared LLM client; cached verdicts are reused."""
         try:
-            response = openai.Completion.create(
-                engine="text-davinci-003",
-                prompt=prompt,
-                max_tokens=150
-            )
-            return response.choices[0].text.strip()
+            return self.analysis_client.analyze(job_title, job_description)
         except Exception as e:
-            print(f"❌ AI analysis failed: {e}")
-            return "Error in analysis."
+            log.warning("❌ AI analysis failed: %s", e)
+            return {"verdict": "No", "score": 0, "rationale": "Error in analysis."}
 
-    def save_application_result(self, job_id, title, company, status, url):
+    def save_application_result(self, job_id, title, company, status, url, prefilter_score=None, token=None):
+        """Buffer a result; it is written with the next `insert_many` and then checkpointed."""
         application_data = {
             "job_id": job_id,
             "title": title,
             "company": company,
             "status": status,
             "url": url,
-            "timestamp": time.strftime('%Y-%m-%d %H:%M:%S')
+            "prefilter_score": prefilter_score,
+            "timestamp": datetime.now(timezone.utc)
         }
-        applications_collection.insert_one(application_data)
-        print(f"Saved application result for {title} at {company}.")
-
-    def link_job_apply(self):
-        # Assuming job URLs are stored in a file 'job_urls.txt'
-        with open('job_urls.txt', 'r') as file:
-            urls = file.readlines()
-
-        for url in urls:
-            self.driver.get(url.strip())
-            time.sleep(random.uniform(1, 3))  # Random delay to mimic human behavior
+        self.results.add(application_data, token)
+        log.debug("Saved application result for %s at %s.", title, company, extra=job_log(url))
 
-            try:
-                job_title = self.driver.find_element(By.XPATH, "//h1[contains(@class, 'job-title')]").text
-                job_description = self.driver.find_element(By.XPATH, "//div[contains(@class, 'job-description')]").text
-                company_name = self.driver.find_element(By.XPATH, "//a[contains(@class, 'topcard__org-name-link')]").text
-                job_id = url.split("/")[-1]  # Extract job ID from URL
+    def link_job_apply(self, source=None):
+        """
+        Process every URL from `source` that has no stored result yet.
 
-                # AI Analysis
+        Args:
+            source: FileUrlSource or MongoUrlQueue; defaults to 'job_urls.txt'.
+                URLs are streamed, and a restart resumes after the last saved result.
+        """
+        source = source or FileUrlSource('job_urls.txt', checkpoint_collection)
+        ensure_indexes()
+        with ResultWriter(applications_collection, source) as self.results:
+            for item in iter_unhandled(source, applications_collection, self.results):
+                with span("linkedin_job", portal="linkedin", url=item.url) as job_span:
+                    job_span.outcome = self.apply_to_url(item.url, item.token)
+
+        log_timing_summary()
+        log.info("Saved %d results.", self.results.written)
+        log.info("Analysis cache: %s", self.analysis_client.cache.stats())
+        log.info("LLM usage: %s", self.analysis_client.usage_summary())
+
+    def apply_to_url(self, url, token=None):
+        """Screen, analyse and (if suitable) Easy Apply to one job; returns the stored status."""
+        extra = job_log(url)
+        job_id = linkedin_job_id(url)  # Known up front, so failures below can still be recorded
+        try:
+            with span("page_load", step="linkedin_job", via="browser"):
+                self.driver.get(url)
+                # Small random delay after the page is ready to mimic human behavior
+                wait_for(self.driver, all_of(dom_ready, selector_present("h1[class*='job-title']")),
+                         "linkedin_job", jitter=(0.3, 1.0))
+
+            job_title = self.driver.find_element(By.XPATH, "//h1[contains(@class, 'job-title')]").text
+            job_description = self.driver.find_element(By.XPATH, "//div[contains(@class, 'job-description')]").text
+            company_name = self.driver.find_element(By.XPATH, "//a[contains(@class, 'topcard__org-name-link')]").text
+
+            # Local pre-filter: config rules and resume similarity, before any LLM call
+            with span("prefilter"):
+                score, reason = screen_job(self.resume_scorer, job_title, job_description, company_name)
+            if reason:
+                log.info("❌ Skipping %s at %s: %s", job_title, company_name, reason, extra=extra)
+                self.save_application_result(job_id, job_title, company_name, "Skipped", url, score, token)
+                return "skipped"
+
+            # AI Analysis
+            with span("analyze") as analyze_span:
                 analysis = self.analyze_job_with_ai(job_title, job_description)
-                if analysis.startswith("Yes"):
+                analyze_span.outcome = analysis["verdict"].lower()
+            if analysis["verdict"] == "Yes":
+                with span("apply_step", step="easy_apply"):
                     easy_apply_button = self.driver.find_element(By.XPATH, "//button[contains(text(), 'Easy Apply')]")
                     easy_apply_button.click()
-                    time.sleep(random.uniform(1, 3))
-                    print(f"✅ Successfully applied to {job_title} at {company_name}.")
-                    self.save_application_result(job_id, job_title, company_name, "Success", url)
-                else:
-                    print(f"❌ Skipping {job_title} at {company_name}: {analysis}")
-                    self.save_application_result(job_id, job_title, company_name, "Skipped", url)
+                    wait_for(self.driver, selector_present("div[class*='jobs-easy-apply-modal']"),
+                             "easy_apply", jitter=(0.3, 1.0))
+                log.info("✅ Successfully applied to %s at %s.", job_title, company_name, extra=extra)
+                self.session.refresh_from(self.driver)
+                self.save_application_result(job_id, job_title, company_name, "Success", url, score, token)
+                return "applied"
+            else:
+                log.info("❌ Skipping %s at %s: %s", job_title, company_name, analysis['rationale'], extra=extra)
+                self.save_application_result(job_id, job_title, company_name, "Skipped", url, score, token)
+                return "skipped"
+
+        except Exception as e:
+            log.warning("❌ Failed to apply to job: %s", e, extra=extra)
+            self.save_application_result(job_id, "Unknown", "Unknown", "Failed", url, token=token)
+            return "failed"
+
+
+def ensure_indexes():
+    """Index results by URL and job ID so already-handled URLs are found with one lookup."""
+    applications_collection.create_index("url")
+    applications_collection.create_index("job_id")
 
-            except Exception as e:
-                print(f"❌ Failed to apply to job: {e}")
-                self.save_application_result(job_id, "Unknown", "Unknown", "Failed", url)
 
 if __name__ == "__main__":
-    Linkedin()
+    parser = argparse.ArgumentParser(description="Screen and Easy Apply to LinkedIn job URLs.")
+    parser.add_argument("--file", default="job_urls.txt", help="Text file with one job URL per line")
+    parser.add_argument("--queue", action="store_true", help="Read URLs from the url_queue collection instead")
+    args = parser.parse_args()
+    Linkedin(MongoUrlQueue(url_queue) if args.queue else FileUrlSource(args.file, checkpoint_collection))
@@ -0,0 +1,322 @@
+"""Shared, batched and rate-limited LLM client for job suitability analysis.
+
+Used by both the scraper and the LinkedIn bot. Postings submitted from any
+thread are packed into batches of up to `batch_size` per chat request and
+answered as structured JSON (`verdict`, `score`, `rationale`), so callers no
+longer parse a free-text reply. Requests run concurrently under a
+token-bucket limiter that respects both requests and tokens per minute, and
+each result carries the tokens and latency attributed to it.
+
+Point `base_url` (or `OPENAI_BASE_URL`) at a local fake server to test
+without calling OpenAI.
+"""
+import json
+import math
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import config
+from analysis_cache import AnalysisCache, cache_key
+from clients import get_openai_client
+from tracing import span
+
+SCHEMA_VERSION = "structured-v1"   # Part of the cache key so old free-text entries are never reused
+MAX_TOKENS_PER_JOB = 200
+MAX_DESCRIPTION_CHARS = 6000
+BATCH_WAIT = 0.5                   # Seconds to wait for a batch to fill before sending it
+
+SYSTEM_PROMPT = """You are an AI assistant for analyzing job postings.
+Judge whether each posting is suitable for a candidate with this profile:
+"{profile}"
+
+Reply with a JSON object of the form
+{{"results": [{{"id": <posting id>, "verdict": "Yes" or "No", "score": <0-100>,
+"rationale": "<one paragraph on why or why not, with any recommendations>"}}]}}
+containing exactly one entry per posting."""
+
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token)."""
+    return len(text) // 4 + 1
+
+
+def parse_score(value):
+    """The model's 0-100 score as an int; ValueError if it is missing or not a number."""
+    try:
+        score = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"score {value!r} is not a number") from None
+    if math.isnan(score):
+        raise ValueError("score is NaN")
+    return int(round(min(max(score, 0), 100)))
+
+
+def parse_verdict(value):
+    """The model's verdict as "Yes" or "No"; ValueError if it is missing or anything else."""
+    verdict = value.strip().rstrip(".").lower() if isinstance(value, str) else None
+    if verdict in ("yes", "y"):
+        return "Yes"
+    if verdict in ("no", "n"):
+        return "No"
+    raise ValueError(f"verdict {value!r} is not Yes or No")
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at `per_minute / 60` per second.
+
+    Args:
+        per_minute: Tokens added per minute; also the bucket capacity.
+    """
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount):
+        """Seconds until `amount` tokens are available (0 if they are now)."""
+        with self._lock:
+            self._refill()
+            amount = min(amount, self.capacity)
+            return max(0.0, (amount - self.tokens) / self.rate)
+
+    def take(self, amount):
+        with self._lock:
+            self._refill()
+            self.tokens -= min(amount, self.capacity)
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute limits applied together."""
+
+    def __init__(self, requests_per_minute, tokens_per_minute):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens):
+        """Block until one request carrying `tokens` tokens may be sent."""
+        with self._lock:  # Serialise callers so a large request is not starved
+            while True:
+                delay = max(self.requests.wait_time(1), self.tokens.wait_time(tokens))
+                if delay <= 0:
+                    break
+                time.sleep(delay)
+            self.requests.take(1)
+            self.tokens.take(tokens)
+
+
+class AnalysisClient:
+    """
+    Batch postings into structured-output chat requests.
+
+    Args:
+        profile: Profile text postings are judged against.
+        model: Chat model name.
+        batch_size: Max postings per request.
+        concurrency: Max requests in flight.
+        requests_per_minute: RPM limit.
+        tokens_per_minute: TPM limit (prompt plus max completion tokens).
+        cache: AnalysisCache to consult first; None disables caching.
+        client: OpenAI client; the shared one for `base_url` is used on first request if omitted.
+        base_url: Alternative API endpoint, e.g. a local fake server.
+    """
+
+    def __init__(self, profile, model=None, batch_size=None, concurrency=None,
+                 requests_per_minute=None, tokens_per_minute=None, cache=None,
+                 client=None, base_url=None):
+        self.profile = profile
+        self.model = model or config.llmModel
+        self.batch_size = batch_size or config.llmBatchSize
+        self.cache = cache
+        self._client = client
+        self.base_url = base_url
+        self.limiter = RateLimiter(requests_per_minute or config.llmRequestsPerMinute,
+                                   tokens_per_minute or config.llmTokensPerMinute)
+        concurrency = concurrency or config.llmConcurrency
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="llm")
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._pending = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self.stats = {"requests": 0, "jobs": 0, "cached": 0, "prompt_tokens": 0,
+                      "completion_tokens": 0, "latency": 0.0, "errors": 0}
+        self._dispatcher = threading.Thread(target=self._dispatch, daemon=True, name="llm-dispatch")
+        self._dispatcher.start()
+
+    @property
+    def client(self):
+        """The OpenAI client, created (and the `openai` package imported) on first use."""
+        if self._client is None:
+            self._client = get_openai_client(self.base_url)
+        return self._client
+
+    def _cache_model(self):
+        return f"{self.model}:{SCHEMA_VERSION}"
+
+    def submit(self, job_title, job_description):
+        """
+        Queue a posting for analysis.
+
+        Returns:
+            Future: Resolves to a dict with `verdict`, `score`, `rationale`,
+            `tokens`, `latency` and `cached`.
+        """
+        future = Future()
+        job_description = (job_description or "")[:MAX_DESCRIPTION_CHARS]
+        if self.cache is not None:
+            key = self.cache_key(job_title, job_description)
+            cached = self.cache.get(key)
+            if cached is not None:
+                result = json.loads(cached)
+                result.update(tokens=0, latency=0.0, cached=True)
+                with self._stats_lock:
+                    self.stats["cached"] += 1
+                future.set_result(result)
+                return future
+        self._pending.put((job_title, job_description, future))
+        return future
+
+    def analyze(self, job_title, job_description):
+        """Analyze one posting, blocking until its batch has been answered."""
+        return self.submit(job_title, job_description).result()
+
+    def analyze_many(self, postings):
+        """Analyze a list of (title, description) tuples; returns results in the same order."""
+        futures = [self.submit(title, description) for title, description in postings]
+        return [future.result() for future in futures]
+
+    def cache_key(self, job_title, job_description):
+        return cache_key(job_title, job_description, self.profile, self._cache_model())
+
+    def _dispatch(self):
+        while True:
+            batch = [self._pending.get()]
+            if batch[0] is None:
+                return
+            deadline = time.monotonic() + BATCH_WAIT
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._pending.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._pending.put(None)  # Stop after this batch
+                    break
+                batch.append(item)
+            self._slots.acquire()  # Backpressure: at most `concurrency` batches in flight
+            self._executor.submit(self._run_batch, batch)
+
+    def _build_messages(self, batch):
+        postings = [
+            {"id": i, "title": title, "description": description}
+            for i, (title, description, _) in enumerate(batch)
+        ]
+        return [
+            {"role": "system", "content": SYSTEM_PROMPT.format(profile=self.profile)},
+            {"role": "user", "content": json.dumps({"postings": postings})},
+        ]
+
+    def _run_batch(self, batch):
+        try:
+            messages = self._build_messages(batch)
+            max_tokens = MAX_TOKENS_PER_JOB * len(batch)
+            prompt_estimate = sum(estimate_tokens(m["content"]) for m in messages)
+            with span("llm", op="rate_limit", jobs=len(batch)):
+                self.limiter.acquire(prompt_estimate + max_tokens)
+
+            start = time.monotonic()
+            with span("llm", op="chat", model=self.model, jobs=len(batch)):
+                response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    response_format={"type": "json_object"},
+                    max_tokens=max_tokens,
+                )
+            latency = time.monotonic() - start
+            results = {}
+            for entry in json.loads(response.choices[0].message.content).get("results", []):
+                try:
+                    results[int(entry["id"])] = entry
+                except (KeyError, TypeError, ValueError):
+                    continue  # An entry we can't match to a posting; that posting fails below
+
+            usage = response.usage
+            prompt_tokens = usage.prompt_tokens if usage else prompt_estimate
+            completion_tokens = usage.completion_tokens if usage else 0
+            with self._stats_lock:
+                self.stats["requests"] += 1
+                self.stats["jobs"] += len(batch)
+                self.stats["prompt_tokens"] += prompt_tokens
+                self.stats["completion_tokens"] += completion_tokens
+                self.stats["latency"] += latency
+
+            # Attribute tokens to each job in proportion to its share of the prompt
+            sizes = [estimate_tokens(title + description) for title, description, _ in batch]
+            total_size = sum(sizes)
+            for i, (title, description, future) in enumerate(batch):
+                entry = results.get(i)
+                if entry is None:
+                    future.set_exception(ValueError(f"No analysis returned for '{title}'"))
+                    continue
+                try:
+                    verdict = parse_verdict(entry.get("verdict"))
+                    score = parse_score(entry.get("score"))
+                except ValueError as e:
+                    future.set_exception(ValueError(f"Bad analysis returned for '{title}': {e}"))
+                    continue
+                result = {
+                    "verdict": verdict,
+                    "score": score,
+                    "rationale": entry.get("rationale", ""),
+                }
+                if self.cache is not None:
+                    self.cache.put(self.cache_key(title, description), json.dumps(result))
+                result.update(
+                    tokens=round((prompt_tokens + completion_tokens) * sizes[i] / total_size),
+                    latency=latency,
+                    cached=False,
+                )
+                future.set_result(result)
+
+        except Exception as e:
+            with self._stats_lock:
+                self.stats["errors"] += 1
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self._slots.release()
+
+    def usage_summary(self):
+        """Return request, token and latency totals."""
+        with self._stats_lock:
+            summary = dict(self.stats)
+        if summary["jobs"]:
+            summary["tokens_per_job"] = (summary["prompt_tokens"] + summary["completion_tokens"]) / summary["jobs"]
+            summary["latency_per_request"] = summary["latency"] / summary["requests"]
+        return summary
+
+    def close(self):
+        """Send any queued postings and wait for in-flight requests."""
+        self._pending.put(None)
+        self._dispatcher.join()
+        self._executor.shutdown(wait=True)
+
+
+def create_analysis_client(profile, cache_path=None, **kwargs):
+    """Build an AnalysisClient backed by the persistent analysis cache."""
+    cache = AnalysisCache(cache_path) if cache_path else AnalysisCache()
+    return AnalysisClient(profile, cache=cache, **kwargs)
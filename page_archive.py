@@ -0,0 +1,124 @@
+"""Append-only archive of fetched pages, for re-parsing without re-crawling.
+
+When `pageArchive` is set in config.py, every results and detail page the
+scraper fetches is compressed (zstd or zlib, as in `description_store`) and
+appended to a local SQLite file together with its URL, the fetch step and
+the fetch time. Rows are never updated or deleted; fetching a page again
+adds a new snapshot, and readers take the latest one per URL unless asked
+otherwise.
+
+`scraper.replay_jobs()` runs parse -> pre-filter -> analyse -> store over
+the archive, so new fields can be backfilled or postings re-scored offline.
+The archive also serves as a benchmark corpus of real pages.
+"""
+import sqlite3
+import threading
+import time
+
+from description_store import compress, decompress
+
+ARCHIVE_PATH = "page_archive.db"
+LISTING_KINDS = ("search", "results_page")
+DETAIL_KINDS = ("job_detail",)
+
+
+class PageArchive:
+    """
+    SQLite-backed, append-only store of page snapshots indexed by URL and fetch time.
+
+    Args:
+        path: SQLite file to append snapshots to.
+    """
+
+    def __init__(self, path=ARCHIVE_PATH):
+        self.path = path
+        self.recorded = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")  # Readers don't block the recording scraper
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT NOT NULL, kind TEXT NOT NULL,"
+            " fetched_at REAL NOT NULL, codec TEXT NOT NULL, size INTEGER NOT NULL, data BLOB NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS pages_url ON pages (url, fetched_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS pages_kind ON pages (kind, fetched_at)")
+        self._conn.commit()
+
+    def record(self, url, kind, html, fetched_at=None):
+        """Append a snapshot of `html` fetched from `url` by step `kind`."""
+        codec, data = compress(html)
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO pages (url, kind, fetched_at, codec, size, data) VALUES (?, ?, ?, ?, ?, ?)",
+                (url, kind, fetched_at or time.time(), codec, len(html), data),
+            )
+            self._conn.commit()
+            self.recorded += 1
+
+    def latest(self, url, before=None):
+        """
+        The most recent snapshot of `url`, or None.
+
+        Args:
+            url: Page URL as it was fetched.
+            before: Only consider snapshots fetched before this Unix time.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT codec, data FROM pages WHERE url = ? AND fetched_at < ? ORDER BY fetched_at DESC LIMIT 1",
+                (url, before or float("inf")),
+            ).fetchone()
+        return decompress(row[0], row[1]) if row else None
+
+    def urls(self, kinds=None):
+        """Set of archived URLs, optionally only those fetched by the given steps."""
+        query, params = "SELECT DISTINCT url FROM pages", []
+        if kinds:
+            query += f" WHERE kind IN ({', '.join('?' * len(kinds))})"
+            params.extend(kinds)
+        with self._lock:
+            return {row[0] for row in self._conn.execute(query, params)}
+
+    def iter_pages(self, kinds=None, url_prefix=None, latest_only=True):
+        """
+        Yield (url, kind, fetched_at, html) snapshots in fetch order.
+
+        Pages are decompressed one at a time, so the archive can be much
+        larger than memory.
+
+        Args:
+            kinds: Fetch steps to include, e.g. LISTING_KINDS; all if None.
+            url_prefix: Only pages whose URL starts with this (e.g. one portal).
+            latest_only: Skip snapshots of a URL that was fetched again later.
+        """
+        where, params = [], []
+        if kinds:
+            where.append(f"kind IN ({', '.join('?' * len(kinds))})")
+            params.extend(kinds)
+        if url_prefix:
+            where.append("substr(url, 1, ?) = ?")
+            params.extend([len(url_prefix), url_prefix])
+        if latest_only:
+            where.append("id IN (SELECT MAX(id) FROM pages GROUP BY url)")
+        query = "SELECT id FROM pages" + (" WHERE " + " AND ".join(where) if where else "") + " ORDER BY id"
+        with self._lock:
+            ids = [row[0] for row in self._conn.execute(query, params)]
+        for page_id in ids:
+            with self._lock:
+                url, kind, fetched_at, codec, data = self._conn.execute(
+                    "SELECT url, kind, fetched_at, codec, data FROM pages WHERE id = ?", (page_id,)
+                ).fetchone()
+            yield url, kind, fetched_at, decompress(codec, data)
+
+    def stats(self):
+        """Snapshot count, distinct URLs and raw vs stored size."""
+        with self._lock:
+            pages, urls, size, stored = self._conn.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT url), COALESCE(SUM(size), 0), COALESCE(SUM(LENGTH(data)), 0) FROM pages"
+            ).fetchone()
+        return {"pages": pages, "urls": urls, "bytes": size, "stored_bytes": stored}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
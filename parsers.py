@@ -0,0 +1,117 @@
+"""Targeted parsing of the careers portal's results and detail pages.
+
+Only the fields the scraper uses are extracted: the `tr.data-row` cells, the
+next-page link in `ul.pagination` and the `span.jobdescription` text. With
+lxml installed, pages are parsed by libxml2 and queried with precompiled
+XPath; otherwise BeautifulSoup is used with a SoupStrainer so that only the
+relevant subtrees are built. See `benchmarks/parse_bench.py` for a
+comparison with full-tree parsing.
+"""
+try:
+    import lxml.html
+    from lxml import etree
+except ImportError:  # pragma: no cover - lxml is optional
+    lxml = None
+
+ROW_FIELDS = {
+    'title': ('a', 'jobTitle-link'),
+    'job_id': ('span', 'jobFacility'),
+    'location': ('span', 'jobLocation'),
+    'department': ('span', 'jobDepartment'),
+}
+
+
+def _has_class(class_name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')"
+
+
+if lxml is not None:
+    _ROWS_XPATH = etree.XPath(f"//tr[{_has_class('data-row')}]")
+    _FIELD_XPATHS = {
+        field: etree.XPath(f".//{tag}[{_has_class(class_name)}][1]")
+        for field, (tag, class_name) in ROW_FIELDS.items()
+    }
+    _NEXT_PAGE_XPATH = etree.XPath(
+        f"(//ul[{_has_class('pagination')}])[1]"
+        f"/li[{_has_class('active')}][1]/following-sibling::li[1]/a/@href"
+    )
+    _DESCRIPTION_XPATH = etree.XPath(f"//span[{_has_class('jobdescription')}][1]")
+
+_strainers = {}
+
+
+def _soup(html, name):
+    """Parse only the subtrees the `name` strainer keeps; bs4 is imported on first use."""
+    from bs4 import BeautifulSoup, SoupStrainer
+    if not _strainers:
+        _strainers['listing'] = SoupStrainer(['tr', 'ul'])
+        _strainers['description'] = SoupStrainer('span', class_='jobdescription')
+    return BeautifulSoup(html, 'html.parser', parse_only=_strainers[name])
+
+
+def _text(element):
+    return element.text_content().strip() if element is not None else "N/A"
+
+
+def _parse_listing_lxml(html):
+    if not html.strip():
+        return [], None
+    tree = lxml.html.fromstring(html)
+    rows = []
+    for row in _ROWS_XPATH(tree):
+        job = {}
+        for field, xpath in _FIELD_XPATHS.items():
+            found = xpath(row)
+            element = found[0] if found else None
+            job[field] = _text(element)
+            if field == 'title':
+                job['href'] = element.get('href') if element is not None else None
+        rows.append(job)
+    next_page = _NEXT_PAGE_XPATH(tree)
+    return rows, (str(next_page[0]) if next_page else None)
+
+
+def _parse_listing_soup(html):
+    soup = _soup(html, 'listing')
+    rows = []
+    for row in soup.select('tr.data-row'):
+        job = {}
+        for field, (tag, class_name) in ROW_FIELDS.items():
+            element = row.find(tag, class_=class_name)
+            job[field] = element.text.strip() if element else "N/A"
+        title_link = row.find('a', class_='jobTitle-link')
+        job['href'] = title_link.get('href') if title_link else None
+        rows.append(job)
+
+    next_href = None
+    pagination = soup.select_one('ul.pagination')
+    current_page = pagination.find('li', class_='active') if pagination else None
+    next_page = current_page.find_next_sibling('li') if current_page else None
+    if next_page and next_page.find('a'):
+        next_href = next_page.find('a').get('href')
+    return rows, next_href
+
+
+def parse_listing(html):
+    """
+    Extract job rows and the next-page link from a results page.
+
+    Returns:
+        tuple: (rows, next_href) where each row is a dict with `title`, `job_id`,
+        `location`, `department` and `href`, and `next_href` is None on the last page.
+    """
+    if lxml is not None:
+        return _parse_listing_lxml(html)
+    return _parse_listing_soup(html)
+
+
+def parse_description(html):
+    """Return the text of `span.jobdescription`, or None if the page has none."""
+    if lxml is not None:
+        if not html.strip():
+            return None
+        found = _DESCRIPTION_XPATH(lxml.html.fromstring(html))
+        return found[0].text_content().strip() if found else None
+    soup = _soup(html, 'description')
+    element = soup.find('span', class_='jobdescription')
+    return element.text.strip() if element else None
@@ -0,0 +1,153 @@
+"""Staged producer/consumer pipeline built on bounded queues and worker threads.
+
+Each stage has its own worker count and a bounded input queue, so a slow
+stage (e.g. the LLM) applies backpressure to the ones before it instead of
+letting work pile up in memory. An optional `limit` caps the number of items
+that make it through every stage: items are only admitted while
+`accepted + in_flight < limit`, so the cap is never overshot even though
+several items are processed at once. Time spent in each stage is recorded
+in `stage_timings` so slow stages can be spotted, and items dropped because
+a stage raised are counted in `failed`.
+"""
+import queue
+import threading
+import time
+from collections import defaultdict
+
+from tracing import get_logger
+
+_DONE = object()
+
+# stage name -> list of seconds spent processing each item
+stage_timings = defaultdict(list)
+log = get_logger("pipeline")
+
+
+class Stage:
+    """
+    One pipeline step.
+
+    Args:
+        name: Stage name used in log messages.
+        func: Callable taking an item and returning the item for the next stage,
+            or None to drop it.
+        workers: Number of threads running this stage.
+        queue_size: Max items waiting for this stage; defaults to 2 * workers.
+    """
+
+    def __init__(self, name, func, workers=1, queue_size=None):
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.queue_size = queue_size or 2 * workers
+
+
+class Pipeline:
+    """Run items through a list of stages concurrently."""
+
+    def __init__(self, stages, limit=None):
+        self.stages = stages
+        self.limit = limit
+        self._cond = threading.Condition()
+        self._accepted = 0
+        self._in_flight = 0
+        self._failed = 0
+        self._results = []
+
+    def _finish(self, result=None, failed=False):
+        with self._cond:
+            self._in_flight -= 1
+            if failed:
+                self._failed += 1
+            if result is not None:
+                self._accepted += 1
+                self._results.append(result)
+            self._cond.notify_all()
+
+    def _admit(self):
+        """Block until an item may enter the pipeline; False once the limit is met."""
+        with self._cond:
+            if self.limit is None:
+                self._in_flight += 1
+                return True
+            while self._accepted + self._in_flight >= self.limit and self._accepted < self.limit:
+                self._cond.wait()
+            if self._accepted >= self.limit:
+                return False
+            self._in_flight += 1
+            return True
+
+    def _worker(self, index, queues, remaining):
+        stage = self.stages[index]
+        inbox = queues[index]
+        is_last = index == len(self.stages) - 1
+        while True:
+            item = inbox.get()
+            if item is _DONE:
+                break
+            start = time.monotonic()
+            failed = False
+            try:
+                result = stage.func(item)
+            except Exception:
+                log.exception("Stage %s failed; dropping the item.", stage.name)
+                result, failed = None, True
+            stage_timings[stage.name].append(time.monotonic() - start)
+            if result is None:
+                self._finish(failed=failed)
+            elif is_last:
+                self._finish(result)
+            else:
+                queues[index + 1].put(result)
+
+        # The last worker out of a stage shuts down the next one
+        with self._cond:
+            remaining[index] -= 1
+            last_out = remaining[index] == 0
+        if last_out and not is_last:
+            for _ in range(self.stages[index + 1].workers):
+                queues[index + 1].put(_DONE)
+
+    def run(self, items):
+        """
+        Feed `items` through the stages and wait for them to drain.
+
+        `items` is consumed lazily, so a generator that paginates will stop
+        being advanced once the limit has been reached.
+
+        Returns:
+            list: Results of the last stage, in completion order.
+        """
+        queues = [queue.Queue(maxsize=stage.queue_size) for stage in self.stages]
+        remaining = [stage.workers for stage in self.stages]
+        threads = []
+        for index, stage in enumerate(self.stages):
+            for n in range(stage.workers):
+                thread = threading.Thread(target=self._worker, args=(index, queues, remaining),
+                                          name=f"{stage.name}-{n}", daemon=True)
+                thread.start()
+                threads.append(thread)
+
+        try:
+            for item in items:
+                if not self._admit():
+                    break
+                queues[0].put(item)  # Blocks while the first stage is saturated
+        finally:
+            for _ in range(self.stages[0].workers):
+                queues[0].put(_DONE)
+            for thread in threads:
+                thread.join()
+
+        return self._results
+
+    @property
+    def accepted(self):
+        with self._cond:
+            return self._accepted
+
+    @property
+    def failed(self):
+        """Items dropped because a stage raised."""
+        with self._cond:
+            return self._failed
@@ -0,0 +1,154 @@
+"""Cheap local screening of jobs before they are sent to the LLM.
+
+Two checks run before `analyze_job_with_ai`:
+
+- the title/company rules from `config.py` (`blackListTitles`,
+  `blacklistCompanies`, `onlyApplyTitles`, `onlyApplyCompanies`), and
+- a TF-IDF cosine similarity between the posting and the profile paragraph,
+  computed with NumPy.
+
+Jobs failing a rule or scoring below `config.prefilterThreshold` skip the
+LLM entirely. The score is returned so callers can store it for ranking.
+"""
+import math
+import re
+from collections import Counter
+
+import numpy as np
+
+import config
+
+TOKEN_RE = re.compile(r"[a-z][a-z0-9+#]+")
+STOP_WORDS = {
+    "and", "the", "for", "with", "that", "this", "are", "you", "our", "will", "have", "has",
+    "from", "your", "who", "all", "can", "not", "but", "its", "was", "into", "such", "their",
+    "they", "them", "any", "within", "including", "where", "which", "other", "about",
+}
+TITLE_WEIGHT = 3  # Title words count this many times as description words
+
+
+def tokenize(text):
+    """Lowercase word tokens without stop words."""
+    return [token for token in TOKEN_RE.findall((text or "").lower()) if token not in STOP_WORDS]
+
+
+def _matches_any(value, patterns):
+    value = (value or "").lower()
+    return any(pattern.lower() in value for pattern in patterns)
+
+
+def check_rules(title, company=None):
+    """
+    Apply the title/company allow- and block-lists from `config.py`.
+
+    Company rules are only applied when the company is known.
+
+    Returns:
+        str: Reason the job is excluded, or None if it passes.
+    """
+    if _matches_any(title, config.blackListTitles):
+        return "blacklisted title"
+    if config.onlyApplyTitles and not _matches_any(title, config.onlyApplyTitles):
+        return "title not in onlyApplyTitles"
+    if company:
+        if _matches_any(company, config.blacklistCompanies):
+            return "blacklisted company"
+        if config.onlyApplyCompanies and not _matches_any(company, config.onlyApplyCompanies):
+            return "company not in onlyApplyCompanies"
+    return None
+
+
+class ResumeScorer:
+    """
+    Score postings by TF-IDF cosine similarity to a profile paragraph.
+
+    The IDF weights are computed once, from `reference` or else from the
+    sentences of the profile, and never change afterwards. A posting
+    therefore gets the same score whatever was scored before it, and
+    stored scores stay comparable with each other and with
+    `config.prefilterThreshold`.
+
+    Args:
+        profile: Profile/resume text to compare postings against.
+        reference: Optional fixed corpus of texts (e.g. sample postings) to take IDF from.
+    """
+
+    def __init__(self, profile, reference=None):
+        self.profile_counts = Counter(tokenize(profile))
+        self.vocabulary = {term: i for i, term in enumerate(sorted(self.profile_counts))}
+        self.profile_tf = self._term_frequencies(self.profile_counts)
+
+        if reference is None:
+            reference = [sentence for sentence in re.split(r"[.;\n]+", profile) if tokenize(sentence)]
+        doc_freq = np.zeros(len(self.vocabulary))
+        for text in reference:
+            doc_freq += self._term_frequencies(Counter(tokenize(text))) > 0
+        num_docs = len(reference)
+        self.idf = np.log((1 + num_docs) / (1 + doc_freq)) + 1
+        # Terms outside the profile vocabulary are weighted as if they never occur in the reference
+        self.outside_idf = math.log(1 + num_docs) + 1
+        self.profile_vec = self.profile_tf * self.idf
+        self.profile_norm = np.linalg.norm(self.profile_vec)
+
+    def _term_frequencies(self, counts):
+        tf = np.zeros(len(self.vocabulary))
+        for term, count in counts.items():
+            index = self.vocabulary.get(term)
+            if index is not None:
+                tf[index] = count
+        return tf
+
+    def _document_counts(self, title, description):
+        counts = Counter(tokenize(description))
+        for token in tokenize(title):
+            counts[token] += TITLE_WEIGHT
+        return counts
+
+    def score_many(self, postings):
+        """
+        Score several postings at once.
+
+        Args:
+            postings: List of (title, description) tuples.
+
+        Returns:
+            numpy.ndarray: Cosine similarity in [0, 1] for each posting.
+        """
+        if not postings:
+            return np.zeros(0)
+        docs = [self._document_counts(title, description) for title, description in postings]
+        tf = np.vstack([self._term_frequencies(counts) for counts in docs])
+
+        doc_vecs = tf * self.idf
+        # Terms outside the profile vocabulary only add to a posting's norm
+        outside = np.array([
+            sum(count * count for term, count in counts.items() if term not in self.vocabulary)
+            for counts in docs
+        ], dtype=float)
+        doc_norms = np.sqrt((doc_vecs ** 2).sum(axis=1) + outside * self.outside_idf ** 2)
+        denominator = doc_norms * self.profile_norm
+        scores = np.divide(doc_vecs @ self.profile_vec, denominator,
+                           out=np.zeros(len(docs)), where=denominator > 0)
+        return scores
+
+    def score(self, title, description):
+        """Score a single posting."""
+        return float(self.score_many([(title, description)])[0])
+
+
+def screen_job(scorer, title, description, company=None, threshold=None):
+    """
+    Run the rules and the similarity score for one job.
+
+    Returns:
+        tuple: (score, reason) where `reason` is None if the job should go to the LLM.
+    """
+    if threshold is None:
+        threshold = config.prefilterThreshold
+    reason = check_rules(title, company)
+    if reason:
+        return 0.0, reason
+    score = scorer.score(title, description)
+    if score < threshold:
+        return score, f"pre-filter score {score:.3f} below {threshold}"
+    return score, None
@@ -0,0 +1,88 @@
+"""Global quotas per calendar window, stored in MongoDB.
+
+Each window (e.g. applications in ISO week 2026-W42) is one document whose
+`used` counter is only incremented while it stays within the limit, using a
+single atomic `find_one_and_update`. Every process and machine sharing the
+database therefore sees the same limit.
+"""
+from datetime import datetime, timedelta, timezone
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+# Quota name -> calendar window it resets on
+WINDOWS = {
+    "apply": "week",
+    "scrape": "month",
+}
+
+
+def window_key(name, now=None):
+    """Return the document ID for the current window of quota `name`, e.g. "apply:2026-W42"."""
+    now = now or datetime.now(timezone.utc)
+    if WINDOWS.get(name) == "week":
+        year, week, _ = now.isocalendar()
+        return f"{name}:{year}-W{week:02d}"
+    return f"{name}:{now:%Y-%m}"
+
+
+def window_end(name, now=None):
+    """When the current window of quota `name` ends and its counter starts from zero."""
+    now = now or datetime.now(timezone.utc)
+    midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    if WINDOWS.get(name) == "week":
+        return midnight - timedelta(days=now.weekday()) + timedelta(weeks=1)  # Next ISO Monday
+    if now.month == 12:
+        return midnight.replace(year=now.year + 1, month=1, day=1)
+    return midnight.replace(month=now.month + 1, day=1)
+
+
+def reserve(collection, name, limit, amount=1, now=None):
+    """
+    Atomically take `amount` units of quota `name` if the window has room.
+
+    Returns:
+        bool: True if the units were reserved.
+    """
+    if amount > limit:
+        return False
+    key = window_key(name, now)
+    try:
+        doc = collection.find_one_and_update(
+            {"_id": key, "used": {"$lte": limit - amount}},
+            {"$inc": {"used": amount}, "$set": {"limit": limit}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+    except DuplicateKeyError:
+        # The window exists but is full, so the upsert tried to create it again
+        return False
+    return doc is not None
+
+
+def reserve_up_to(collection, name, limit, amount, now=None):
+    """
+    Reserve as many of `amount` units as the window still has room for.
+
+    Returns:
+        int: Units reserved (0 if the window is full).
+    """
+    while True:
+        available = min(amount, limit - used(collection, name, now))
+        if available <= 0:
+            return 0
+        if reserve(collection, name, limit, available, now):
+            return available
+        # Another process took some of the room first; try again with what is left
+
+
+def release(collection, name, amount=1, now=None):
+    """Give back units reserved in the current window, e.g. after a failed attempt."""
+    collection.update_one({"_id": window_key(name, now), "used": {"$gte": amount}},
+                          {"$inc": {"used": -amount}})
+
+
+def used(collection, name, now=None):
+    """Units of quota `name` used in the current window."""
+    doc = collection.find_one({"_id": window_key(name, now)})
+    return doc["used"] if doc else 0
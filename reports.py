@@ -0,0 +1,195 @@
+"""Reports computed inside MongoDB, and streaming columnar exports.
+
+Each report is one aggregation pipeline that starts with a `$match` on an
+indexed datetime field (`Inserted At`, `Applied At` and `Last Attempt At`
+on jobs, `timestamp` on LinkedIn applications), so only the requested time
+window is read and the grouping happens on the server. Results come back
+as small lists of rows.
+
+`export()` streams a collection, or a time window of it, to Parquet or
+Arrow IPC in record batches, so memory use depends on the batch size and
+not on the size of the collection. Exports need the optional `pyarrow`
+package.
+
+LinkedIn results used to store `timestamp` as a local-time string;
+`migrate_application_timestamps()` converts those to dates on the server.
+"""
+import time
+from datetime import datetime, timedelta, timezone
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # Only needed for exports
+    pyarrow = None
+
+BATCH_SIZE = 5000
+LEGACY_TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Host name of the job link, for jobs stored before `Portal` was recorded
+_PORTAL = {"$ifNull": ["$Portal", {"$arrayElemAt": [{"$split": ["$Link", "/"]}, 2]}]}
+
+
+def ensure_indexes(jobs, applications):
+    """Create the datetime indexes the reports filter on."""
+    jobs.create_index("Inserted At")
+    jobs.create_index("Applied At")
+    jobs.create_index("Last Attempt At")
+    applications.create_index("timestamp")
+
+
+def window_start(days, now=None):
+    """Start of the report window covering the last `days` days."""
+    return (now or datetime.now(timezone.utc)) - timedelta(days=days)
+
+
+def _rate(part, whole):
+    return {"$cond": [{"$gt": [whole, 0]}, {"$divide": [part, whole]}, None]}
+
+
+def _run(collection, pipeline):
+    return list(collection.aggregate(pipeline, allowDiskUse=True))
+
+
+def applied_per_portal(jobs, since):
+    """Applications sent since `since`, per portal."""
+    return _run(jobs, [
+        {"$match": {"Applied At": {"$gte": since}}},
+        {"$group": {"_id": _PORTAL, "applied": {"$sum": 1}, "avg_score": {"$avg": "$AI Score"}}},
+        {"$sort": {"applied": -1}},
+    ])
+
+
+def apply_success_rate(jobs, since):
+    """Per portal, how many of the jobs attempted since `since` were applied to."""
+    return _run(jobs, [
+        {"$match": {"Last Attempt At": {"$gte": since}}},
+        {"$group": {"_id": _PORTAL,
+                    "attempted": {"$sum": 1},
+                    "applied": {"$sum": {"$cond": ["$Applied", 1, 0]}},
+                    "attempts": {"$sum": "$Attempts"}}},
+        {"$addFields": {"success_rate": _rate("$applied", "$attempted")}},
+        {"$sort": {"attempted": -1}},
+    ])
+
+
+def yes_rate_by_keyword(jobs, since):
+    """Per search keyword: jobs stored since `since`, how many the pre-filter skipped and the LLM's yes-rate."""
+    return _run(jobs, [
+        {"$match": {"Inserted At": {"$gte": since}}},
+        {"$group": {"_id": {"$ifNull": ["$Keyword", "unknown"]},
+                    "jobs": {"$sum": 1},
+                    "judged": {"$sum": {"$cond": [{"$gt": ["$AI Score", None]}, 1, 0]}},
+                    "yes": {"$sum": {"$cond": [{"$eq": ["$Apply", "Y"]}, 1, 0]}},
+                    "avg_score": {"$avg": "$AI Score"}}},
+        {"$addFields": {"skipped": {"$subtract": ["$jobs", "$judged"]},
+                        "yes_rate": _rate("$yes", "$judged")}},
+        {"$sort": {"jobs": -1}},
+    ])
+
+
+def linkedin_outcomes(applications, since):
+    """LinkedIn results since `since`, per status."""
+    return _run(applications, [
+        {"$match": {"timestamp": {"$gte": since}}},
+        {"$group": {"_id": "$status", "count": {"$sum": 1}, "avg_prefilter": {"$avg": "$prefilter_score"}}},
+        {"$sort": {"count": -1}},
+    ])
+
+
+def migrate_application_timestamps(applications, tz=None):
+    """
+    Convert string `timestamp`s written by older versions to dates, in one server-side update.
+
+    Args:
+        applications: LinkedIn results collection.
+        tz: UTC offset the strings were written in; defaults to this machine's.
+
+    Returns:
+        int: Documents converted.
+    """
+    result = applications.update_many(
+        {"timestamp": {"$type": "string"}},
+        [{"$set": {"timestamp": {"$dateFromString": {
+            "dateString": "$timestamp", "format": LEGACY_TIMESTAMP_FORMAT,
+            "timezone": tz or time.strftime("%z"), "onError": "$timestamp"}}}}],
+    )
+    return result.modified_count
+
+
+def iter_batches(collection, query=None, projection=None, batch_size=BATCH_SIZE):
+    """Yield lists of up to `batch_size` documents, fetched `batch_size` at a time."""
+    batch = []
+    for doc in collection.find(query or {}, projection).batch_size(batch_size):
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _require_pyarrow():
+    if pyarrow is None:
+        raise RuntimeError("Exports need the pyarrow package: pip install pyarrow")
+
+
+def _table(batch, schema):
+    rows = [{field.name: doc.get(field.name) for field in schema} for doc in batch]
+    return pyarrow.Table.from_pylist(rows, schema=schema)
+
+
+def export(collection, path, schema, query=None, batch_size=BATCH_SIZE):
+    """
+    Stream the documents matching `query` to a Parquet (.parquet) or Arrow IPC (.arrow) file.
+
+    Args:
+        collection: Collection to export.
+        path: Output file; the extension picks the format.
+        schema: pyarrow schema of the exported fields, e.g. from `job_schema()`.
+        query: Optional filter, e.g. a datetime window.
+        batch_size: Documents per record batch.
+
+    Returns:
+        int: Documents written.
+    """
+    _require_pyarrow()
+    projection = {field.name: 1 for field in schema}
+    projection["_id"] = 0
+    if path.endswith(".parquet"):
+        writer = pyarrow.parquet.ParquetWriter(path, schema, compression="zstd")
+    else:
+        writer = pyarrow.ipc.new_file(path, schema)
+    written = 0
+    try:
+        for batch in iter_batches(collection, query, projection, batch_size):
+            writer.write_table(_table(batch, schema))
+            written += len(batch)
+    finally:
+        writer.close()
+    return written
+
+
+def job_schema():
+    """Columns exported from `processeng_jobs`."""
+    _require_pyarrow()
+    timestamp = pyarrow.timestamp("ms", tz="UTC")
+    return pyarrow.schema([
+        ("Job ID", pyarrow.string()), ("Title", pyarrow.string()), ("Location", pyarrow.string()),
+        ("Department", pyarrow.string()), ("Link", pyarrow.string()), ("Portal", pyarrow.string()),
+        ("Keyword", pyarrow.string()), ("Prefilter Score", pyarrow.float64()), ("AI Score", pyarrow.float64()),
+        ("Apply", pyarrow.string()), ("Applied", pyarrow.bool_()), ("Status", pyarrow.string()),
+        ("Attempts", pyarrow.int32()), ("Duplicate Of", pyarrow.string()), ("Description Hash", pyarrow.string()),
+        ("Inserted At", timestamp), ("Applied At", timestamp), ("Last Attempt At", timestamp),
+    ])
+
+
+def application_schema():
+    """Columns exported from `linkedin_bot.applications`."""
+    _require_pyarrow()
+    return pyarrow.schema([
+        ("job_id", pyarrow.string()), ("title", pyarrow.string()), ("company", pyarrow.string()),
+        ("status", pyarrow.string()), ("url", pyarrow.string()), ("prefilter_score", pyarrow.float64()),
+        ("timestamp", pyarrow.timestamp("ms", tz="UTC")),
+    ])
@@ -0,0 +1,165 @@
+"""Long-running scheduler that scrapes and applies within calendar quotas.
+
+Instead of cold one-shot runs from cron, one process keeps its MongoDB
+connections, LLM client and pooled browsers warm and runs two tasks:
+
+- scrape: the search matrix from `search_planner`, capped by
+  `monthlyScrapeLimit` new jobs per calendar month;
+- apply: `applier.run_worker`, capped by `weeklyApplicationLimit`
+  applications per ISO week.
+
+Both limits are counted in the `quotas` collection, so they hold however
+often (or on however many machines) the bot is started. When a quota is
+used up the task sleeps until its window ends. The next due time of each
+task is stored in the `scheduler_state` collection, so a restarted daemon
+picks up where the previous one stopped instead of running everything
+again.
+
+Usage:
+    python scheduler.py             # run until SIGINT/SIGTERM
+    python scheduler.py --once      # run whatever is due, then exit
+"""
+import argparse
+import signal
+import threading
+from datetime import datetime, timedelta, timezone
+
+import applier
+import config
+import quotas
+import scraper
+from search_planner import plan_searches, run_searches
+from tracing import flush, get_logger, span
+
+log = get_logger("scheduler")
+
+STATE_ID = "scheduler"
+MAX_SLEEP = 300  # Seconds; wake up at least this often to log a heartbeat
+
+
+def _utc(value):
+    """Datetimes read back from MongoDB are naive UTC."""
+    if value is None:
+        return None
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+class Scheduler:
+    """
+    Run the scrape and apply tasks whenever they are due and have quota left.
+
+    Args:
+        state_collection: Collection holding the persisted schedule.
+        quota_collection: Collection holding the quota counters.
+    """
+
+    TASKS = ("scrape", "apply")
+
+    def __init__(self, state_collection, quota_collection):
+        self.state_collection = state_collection
+        self.quota_collection = quota_collection
+        self.stop_event = threading.Event()
+        state = state_collection.find_one({"_id": STATE_ID}) or {}
+        now = datetime.now(timezone.utc)
+        self.next_run = {task: _utc(state.get(f"next_{task}_at")) or now for task in self.TASKS}
+        for task in self.TASKS:
+            if self.next_run[task] > now:
+                log.info("Resuming: next %s run at %s", task, self.next_run[task])
+
+    def _save(self, task, now, result):
+        self.state_collection.update_one(
+            {"_id": STATE_ID},
+            {"$set": {f"next_{task}_at": self.next_run[task], f"last_{task}_at": now,
+                      f"last_{task}_result": result, "heartbeat": now}},
+            upsert=True,
+        )
+
+    def scrape_within_quota(self, portal_url, num_jobs, **kwargs):
+        """`scrape_jobs` with its budget taken from, and unused jobs returned to, the monthly quota."""
+        granted = quotas.reserve_up_to(self.quota_collection, "scrape", config.monthlyScrapeLimit, num_jobs)
+        if not granted:
+            return []
+        jobs = []
+        try:
+            jobs = scraper.scrape_jobs(portal_url, num_jobs=granted, **kwargs)
+        finally:
+            if len(jobs) < granted:
+                quotas.release(self.quota_collection, "scrape", granted - len(jobs))
+        return jobs
+
+    def run_scrape(self, now):
+        """Scrape if the monthly quota allows; return when to run next and a result summary."""
+        limit = config.monthlyScrapeLimit
+        if quotas.used(self.quota_collection, "scrape", now) >= limit:
+            return quotas.window_end("scrape", now), "quota_full"
+        results = run_searches(plan_searches(), self.scrape_within_quota)
+        stored = sum(len(jobs) for jobs in results.values())
+        log.info("Scrape cycle stored %d jobs (%d of %d used this month)", stored,
+                 quotas.used(self.quota_collection, "scrape"), limit)
+        if quotas.used(self.quota_collection, "scrape") >= limit:
+            return quotas.window_end("scrape"), f"stored {stored}, quota_full"
+        return datetime.now(timezone.utc) + timedelta(seconds=config.scrapeInterval), f"stored {stored}"
+
+    def run_apply(self, now):
+        """Apply if the weekly quota allows; return when to run next and a result summary."""
+        limit = config.weeklyApplicationLimit
+        if quotas.used(self.quota_collection, "apply", now) >= limit:
+            return quotas.window_end("apply", now), "quota_full"
+        applied = applier.run_worker()
+        if quotas.used(self.quota_collection, "apply") >= limit:
+            return quotas.window_end("apply"), f"applied {applied}, quota_full"
+        # Nothing (more) to apply to yet; look again after new jobs may have been scraped
+        return datetime.now(timezone.utc) + timedelta(seconds=config.applyPollInterval), f"applied {applied}"
+
+    def run_due(self):
+        """Run every task whose time has come; return the earliest next run time."""
+        for task in self.TASKS:
+            now = datetime.now(timezone.utc)
+            if self.stop_event.is_set() or self.next_run[task] > now:
+                continue
+            with span("scheduler", op=task) as task_span:
+                try:
+                    self.next_run[task], result = getattr(self, f"run_{task}")(now)
+                except Exception as e:
+                    # Don't let one failing cycle kill the daemon; retry after a short pause
+                    log.error("%s cycle failed: %s", task, e)
+                    self.next_run[task], result = now + timedelta(seconds=config.applyPollInterval), f"error: {e}"
+                    task_span.outcome = "error"
+            self._save(task, now, result)
+            log.info("Next %s run at %s (%s)", task, self.next_run[task], result)
+        flush()
+        return min(self.next_run.values())
+
+    def run_forever(self):
+        """Run tasks as they fall due until `stop()` is called."""
+        log.info("Scheduler started.")
+        while not self.stop_event.is_set():
+            next_run = self.run_due()
+            delay = (next_run - datetime.now(timezone.utc)).total_seconds()
+            self.stop_event.wait(min(max(delay, 0), MAX_SLEEP))
+            self.state_collection.update_one({"_id": STATE_ID},
+                                             {"$set": {"heartbeat": datetime.now(timezone.utc)}}, upsert=True)
+        log.info("Scheduler stopped.")
+
+    def stop(self, *_):
+        """Finish the current cycle and exit; safe to call from a signal handler."""
+        self.stop_event.set()
+
+
+def create_scheduler():
+    """Scheduler using the scraper's database for its state and the shared quota counters."""
+    return Scheduler(scraper.mongo_db["scheduler_state"], applier.quota_collection)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape and apply continuously within the configured quotas.")
+    parser.add_argument("--once", action="store_true", help="Run whatever is due, then exit")
+    args = parser.parse_args()
+
+    scheduler = create_scheduler()
+    if args.once:
+        scheduler.run_due()
+    else:
+        signal.signal(signal.SIGTERM, scheduler.stop)
+        signal.signal(signal.SIGINT, scheduler.stop)
+        scheduler.run_forever()
@@ -1,35 +1,30 @@
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from bs4 import BeautifulSoup
-import time
-import pandas as pd
-from dotenv import load_dotenv
-from openai import OpenAI
-import os
-from pymongo import MongoClient
-
-load_dotenv()
-mongo_uri = os.getenv("MONGO_URI")
-openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-mongo_client = MongoClient(mongo_uri,tls=True,tlsAllowInvalidCertificates=True)
-mongo_db = mongo_client['job_scraper']  # Replace with your database name
+import threading
+from urllib.parse import parse_qs, urlencode, urljoin, urlsplit
+import config
+from clients import lazy_database
+from fetcher import PageFetcher
+from analysis_cache import cache_key
+from description_store import DescriptionStore
+from llm_client import create_analysis_client
+from page_archive import DETAIL_KINDS, LISTING_KINDS, PageArchive
+from job_store import BulkJobWriter, SeenJobIds, ensure_indexes, find_known_job_ids
+from prefilter import ResumeScorer, check_rules, screen_job
+from parsers import parse_description, parse_listing
+from pipeline import Pipeline, Stage
+from search_planner import plan_searches, run_searches
+from tracing import get_logger, job_log, span
+from watermarks import SearchWatermark, portal_name
+from waits import wait_for, dom_ready, selector_present, all_of, any_of, log_timing_summary
+
+# Connections are opened on first use (see clients.py)
+mongo_db = lazy_database('job_scraper')  # Replace with your database name
 mongo_collection = mongo_db['processeng_jobs']  # Replace with your collection name
+watermark_collection = mongo_db['search_watermarks']
+description_collection = mongo_db['job_descriptions']
+log = get_logger("scraper")
 
 
-
-def analyze_job_with_ai(job_title, job_description):
-    """Send job details to GPT-4 for analysis."""
-    prompt = f"""
-    Analyze the following job posting:
-    Job Title: {job_title}
-    Job Description: {job_description}
-
-
-    Determine if this job is suitable for someone with experience below:
-    "Bachelor in Chemical Engineering, an experienced process control engineer specializing in the design 
+PROFILE_SUMMARY = """Bachelor in Chemical Engineering, an experienced process control engineer specializing in the design 
     and optimization of hydroprocessing units, with a strong focus on operational efficiency. 
     As a Senior Operation Engineer, I developed MEGAT, a virtual assistant that leverages Power BI and Python 
     to streamline reporting and optimize unit operations. I have successfully managed complex projects, 
@@ -37,159 +32,395 @@ def analyze_job_with_ai(job_title, job_description):
     Group III+ base oil plant. My expertise extends to safety governance, where I implemented critical procedures 
     to enhance safety culture. Proficient in data analysis and process simulations, I excel in troubleshooting high-pressure 
     situations and leading multidisciplinary teams. With advanced technical skills in programming and engineering software, 
-    I am dedicated to driving innovation and achieving project success in fast-paced environments."
+    I am dedicated to driving innovation and achieving project success in fast-paced environments."""
+
+analysis_client = None  # Created by get_analysis_client() on first use
+page_archive = None     # Created by get_page_archive() if recording is enabled
+resume_scorer = ResumeScorer(PROFILE_SUMMARY)
+_lazy_lock = threading.Lock()  # Concurrent searches must share one client and one archive
+
+
+def get_analysis_client():
+    """The scraper's shared AnalysisClient, created on first use."""
+    global analysis_client
+    with _lazy_lock:
+        if analysis_client is None:
+            analysis_client = create_analysis_client(PROFILE_SUMMARY)
+        return analysis_client
 
 
-    Provide a summary of one paragraphs why or why not and include any recommendations.
-    Always start your analysis with "Yes" or "No".
+def get_page_archive():
+    """The archive fetched pages are recorded to (`pageArchive` in config.py), or None."""
+    global page_archive
+    with _lazy_lock:
+        if page_archive is None and config.pageArchive:
+            page_archive = PageArchive(config.pageArchive)
+        return page_archive
+
+
+def get_description_store():
+    """Description store whose verdicts are only reused for this profile and model."""
+    client = get_analysis_client()
+    return DescriptionStore(description_collection, cache_key("", "", PROFILE_SUMMARY, client._cache_model())[:16])
+
+
+def analyze_job_with_ai(job_title, job_description):
     """
-    response = openai_client.chat.completions.create(  
-        model="gpt-4o",
-        messages=[{"role": "system", "content": "You are an AI assistant for analyzing job postings."},
-                  {"role": "user", "content": prompt}]
-    )
-    return response.choices[0].message.content
-
-# MongoDB Function
-def insert_job_into_mongo(collection, job_data):
-    """Insert job data into MongoDB, avoiding duplicates."""
-    existing_job = collection.find_one({"Job ID": job_data['Job ID']})
-    if not existing_job:
-        job_data['Applied'] = False  # Add the 'Applied' field
-        collection.insert_one(job_data)
-        print(f"Inserted job: {job_data['Title']} ({job_data['Job ID']})")
-    else:
-        print(f"Job already exists: {job_data['Title']} ({job_data['Job ID']})")
-
-
-def scrape_jobs(base_url, keyword="Process Engineer", location="", num_jobs=30):
-    # Initialize Selenium WebDriver
-    options = webdriver.ChromeOptions()
-    options.add_argument('--headless')
-    driver = webdriver.Chrome(options=options)
-    driver.get(base_url)
+    Send job details to the LLM for analysis, reusing cached verdicts for seen postings.
 
+    Returns:
+        dict: `verdict` ("Yes"/"No"), `score` (0-100), `rationale`, `tokens`, `latency`, `cached`.
+    """
+    return get_analysis_client().analyze(job_title, job_description)
+
+
+# Workers per pipeline stage
+FETCH_WORKERS = 4
+ANALYSIS_WORKERS = config.llmBatchSize * config.llmConcurrency  # Enough waiting jobs to fill every batch
+DB_WORKERS = 1
+
+# Substrings that show a page was rendered on the server with the content we need.
+# A results page only counts if it has result rows or the portal's "no jobs found"
+# message; the search form alone is on every page, including JS-rendered ones.
+NO_RESULTS_MARKERS = ('id="noresults"', 'There are currently no open jobs')
+LISTING_MARKERS = ('data-row',) + NO_RESULTS_MARKERS
+DETAIL_MARKERS = ('jobdescription',)
+LISTING_READY = all_of(dom_ready, any_of(selector_present('tr.data-row'), selector_present('#noresults')))
+DETAIL_READY = any_of(selector_present('span.jobdescription'), dom_ready)
+
+
+def search_jobs(fetcher, base_url, keyword, location):
+    """Return the HTML of the first results page, or None if the search failed."""
+    # Newest first, so incremental runs can stop at the search's watermark
+    query = urlencode({'q': keyword, 'locationsearch': location,
+                       'sortColumn': 'referencedate', 'sortDirection': 'desc'})
+    search_url = f"{base_url}/search/?{query}"
+    with span("page_load", step="search", via="http") as search_span:
+        html = fetcher.fetch_http(search_url, LISTING_MARKERS)
+        if html is None:
+            search_span.outcome = "fallback"
+    if html is not None:
+        fetcher.record(search_url, html, "search")
+        return html
+
+    # Fall back to rendering the same sorted search in the browser. Filling in
+    # the search form instead would return the portal's default order, which
+    # the watermark cannot stop on.
     try:
-        # Perform search
-        keyword_input = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "input.keywordsearch-q"))
-        )
-        location_input = driver.find_element(By.CSS_SELECTOR, "input.keywordsearch-locationsearch")
-        search_button = driver.find_element(By.CSS_SELECTOR, "input.keywordsearch-button")
+        with fetcher.driver_lock, span("page_load", step="search", via="browser"):
+            driver = fetcher.driver
+            driver.get(search_url)
+            # Rows may legitimately be missing (no results), so a timeout is not fatal
+            wait_for(driver, LISTING_READY, "search_results")
+            fetcher.browser_pages += 1
+            html = driver.page_source
+            fetcher.record(search_url, html, "search")
+            return html
 
-        keyword_input.clear()
-        keyword_input.send_keys(keyword)
-        location_input.clear()
-        location_input.send_keys(location)
-        search_button.click()
+    except Exception as e:
+        log.warning("Search interaction failed: %s", e)
+        return None
 
-        time.sleep(3)
 
-    except Exception as e:
-        print("Search interaction failed:", e)
-        driver.quit()
-        return []
+def jobs_from_rows(base_url, rows):
+    """Job dicts for the rows `parse_listing` found on a results page."""
+    return [{
+        'Title': row['title'],
+        'Job ID': row['job_id'],
+        'Location': row['location'],
+        'Department': row['department'],
+        'Link': urljoin(base_url, row['href']) if row['href'] else "N/A",
+    } for row in rows]
+
+
+def iter_job_rows(fetcher, base_url, page_html, scraped_job_ids, watermark):
+    """
+    Yield new job rows from the results pages, following pagination lazily.
+
+    Pagination stops early once the search's watermark says the remaining
+    pages only hold jobs we already have.
+
+    Args:
+        fetcher: PageFetcher used for the next results pages.
+        base_url: Portal root the pagination links are relative to.
+        page_html: HTML of the first results page.
+        scraped_job_ids: SeenJobIds of jobs already handled in this run, possibly by other searches.
+        watermark: SearchWatermark for this search; marked exhausted when the crawl ends naturally.
+
+    Yields:
+        dict: Title, Job ID, Location, Department and Link of a job not seen before.
+    """
+    while True:
+        with span("parse", step="listing"):
+            rows, next_page_link = parse_listing(page_html)
+
+        if not rows:
+            if any(marker in page_html for marker in NO_RESULTS_MARKERS):
+                log.info("No job rows found.")
+                watermark.exhausted = True
+            else:
+                # Not proof the search is finished (e.g. the rows never rendered); crawl it fully next time
+                log.warning("Results page has no job rows and no 'no results' message; stopping this search.")
+            return
+
+        page_jobs = jobs_from_rows(base_url, rows)
+
+        # Skip jobs already in MongoDB (one query per page) or scraped earlier
+        page_ids = [job['Job ID'] for job in page_jobs]
+        known_ids = find_known_job_ids(mongo_collection, page_ids) | scraped_job_ids.known(page_ids)
+        stop_after_page = watermark.observe_page(page_ids, known_ids)
+        for job in page_jobs:
+            if job['Job ID'] in known_ids or not scraped_job_ids.claim(job['Job ID']):
+                continue
+            yield job
+
+        # Check for next page using pagination
+        if stop_after_page:
+            watermark.exhausted = True
+            return
+        if not next_page_link:
+            log.info("No next page available.")
+            watermark.exhausted = True
+            return
+
+        try:
+            page_html = fetcher.get(base_url + next_page_link, LISTING_MARKERS, LISTING_READY, "results_page")
+        except Exception as e:
+            log.warning("Pagination navigation failed: %s", e)
+            return
+
+
+def job_stages(fetcher, portal, job_writer, descriptions,
+               fetch_workers=FETCH_WORKERS, analysis_workers=ANALYSIS_WORKERS, db_workers=DB_WORKERS):
+    """
+    The fetch -> analyse -> store stages shared by `scrape_jobs` and `replay_jobs`.
+
+    Args:
+        fetcher: Anything with `get(url, markers, ready_condition, step)`, e.g. a
+            PageFetcher or an ArchiveFetcher.
+        portal: Portal name used to tag spans.
+        job_writer: BulkJobWriter the analysed (and skipped) jobs are written to.
+        descriptions: DescriptionStore for descriptions and near-duplicate verdicts.
+
+    Returns:
+        list: Stage objects for a Pipeline.
+    """
+    def skip(job, score, reason):
+        # Stored as a "No" so later runs don't fetch it again; it doesn't count towards num_jobs
+        log.info("Skipping %s (%s): %s", job['Title'], job['Job ID'], reason, extra=job_log(job['Job ID']))
+        job.pop('Description', None)
+        job.update({'Prefilter Score': score, 'AI Analysis': f"Skipped: {reason}", 'Apply': 'N', 'Applied': False})
+        job_writer.add(job)
+        return None
+
+    def fetch_details(job):
+        with span("fetch", job_id=job['Job ID'], portal=portal) as fetch_span:
+            reason = check_rules(job['Title'])
+            if reason:
+                fetch_span.outcome = "skipped"
+                return skip(job, 0.0, reason)
+
+            detail_html = fetcher.get(job['Link'], DETAIL_MARKERS, DETAIL_READY, "job_detail")
+            with span("parse", step="detail"):
+                description = parse_description(detail_html)
+            job['Description'] = description or "No description available."
+
+            # Keep the text (compressed, once per distinct description) so it can be re-analysed
+            signature = None
+            if description:
+                with span("mongo", op="store_description"):
+                    job['Description Hash'], signature = descriptions.put(job['Title'], description, job['Job ID'])
+
+            # Cheap local similarity check before spending an LLM call
+            with span("prefilter"):
+                score, reason = screen_job(resume_scorer, job['Title'], job['Description'])
+            job['Prefilter Score'] = score
+            if reason:
+                fetch_span.outcome = "skipped"
+                return skip(job, score, reason)
+
+            # A repost of a posting we already judged gets the same verdict without the LLM
+            if signature is not None:
+                with span("mongo", op="find_near_duplicate"):
+                    match = descriptions.find_judged(signature)
+                if match is not None and match['job_id'] != job['Job ID']:
+                    descriptions.count_reuse()
+                    job['Duplicate Of'] = match['job_id']
+                    job['Reused Analysis'] = match
+                    fetch_span.outcome = "duplicate"
+            return job
+
+    def analyze(job):
+        with span("analyze", job_id=job['Job ID'], portal=portal) as analyze_span:
+            description = job.pop('Description')
+            analysis = job.pop('Reused Analysis', None)
+            if analysis is None:
+                analysis = analyze_job_with_ai(job['Title'], description)
+                if 'Description Hash' in job:
+                    descriptions.record_analysis(job['Description Hash'], job['Job ID'], analysis)
+            analyze_span.outcome = analysis['verdict'].lower()
+            analyze_span.tag(cached=analysis.get('cached', False), duplicate='Duplicate Of' in job)
+        job['AI Analysis'] = analysis['rationale']
+        job['AI Score'] = analysis['score']
+        job['Apply'] = analysis['verdict'][0]  # "Y" or "N"
+        job['Applied'] = False  # Initialize as False
+        log.debug("Analyzed %s (%s): %s, score %s", job['Title'], job['Job ID'], analysis['verdict'],
+                  analysis['score'], extra=job_log(job['Job ID']))
+        return job
+
+    def store(job):
+        job_writer.add(job)
+        return job
+
+    return [
+        Stage("fetch", fetch_details, workers=fetch_workers),
+        Stage("analyze", analyze, workers=analysis_workers),
+        Stage("store", store, workers=db_workers),
+    ]
+
+
+def scrape_jobs(base_url, keyword="Process Engineer", location="", num_jobs=30, use_http=True,
+                fetch_workers=FETCH_WORKERS, analysis_workers=ANALYSIS_WORKERS, db_workers=DB_WORKERS,
+                scraped_job_ids=None):
+    """
+    Run one search on a careers portal and store up to `num_jobs` new, analysed jobs.
+
+    `scraped_job_ids` (a SeenJobIds) can be shared between concurrent searches
+    so a posting found by more than one of them is only processed once.
+
+    Returns:
+        list: The jobs stored by this search.
+    """
+    # Pages are fetched over HTTP; a headless Chrome is only started if a page needs JavaScript
+    fetcher = PageFetcher(use_http=use_http, archive=get_page_archive())
+    portal = portal_name(base_url)
+
+    ensure_indexes(mongo_collection)
+    job_writer = BulkJobWriter(mongo_collection)
+    descriptions = get_description_store()
+    descriptions.ensure_indexes()
+
+    # Detail fetches, GPT calls and DB writes overlap; each stage has its own
+    # worker count and bounded queue, and the pipeline never admits more jobs
+    # than are still needed to reach num_jobs.
+    pipeline = Pipeline(job_stages(fetcher, portal, job_writer, descriptions,
+                                   fetch_workers, analysis_workers, db_workers), limit=num_jobs)
 
     try:
-        jobs = []
-        scraped_job_ids = set()  # To track scraped job IDs in the current session
-        while len(jobs) < num_jobs:
-            time.sleep(3)
-            soup = BeautifulSoup(driver.page_source, 'html.parser')
-            job_rows = soup.select('tr.data-row')  # Ensure this matches your HTML structure
-
-            if not job_rows:
-                print("No job rows found.")
-                break
-
-            for row in job_rows:
-                try:
-                    # Extract job details
-                    title_elem = row.find('a', class_='jobTitle-link')
-                    job_id_elem = row.find('span', class_='jobFacility')
-                    location_elem = row.find('span', class_='jobLocation')
-                    department_elem = row.find('span', class_='jobDepartment')
-
-                    # Ensure elements are valid
-                    title = title_elem.text.strip() if title_elem else "N/A"
-                    job_id = job_id_elem.text.strip() if job_id_elem else "N/A"
-                    location = location_elem.text.strip() if location_elem else "N/A"
-                    department = department_elem.text.strip() if department_elem else "N/A"
-                    link = "https://careers.aramco.com" + title_elem['href'] if title_elem else "N/A"
-
-                    # Skip job if it already exists in MongoDB or was scraped earlier
-                    if mongo_collection.find_one({"Job ID": job_id}) or job_id in scraped_job_ids:
-                        continue
-
-                    # Fetch job details
-                    driver.get(link)
-                    time.sleep(3)
-
-                    detail_soup = BeautifulSoup(driver.page_source, 'html.parser')
-                    description_elem = detail_soup.find('span', class_='jobdescription')
-                    job_description = description_elem.text.strip() if description_elem else "No description available."
-
-                    # Analyze with AI
-                    analysis = analyze_job_with_ai(title, job_description)
-
-                    # Add job data
-                    job_data = {
-                        'Title': title,
-                        'Job ID': job_id,
-                        'Location': location,
-                        'Department': department,
-                        'Link': link,
-                        'AI Analysis': analysis,
-                        'Apply': analysis[0],
-                        'Applied': False  # Initialize as False
-                    }
-
-                    insert_job_into_mongo(mongo_collection, job_data)
-                    jobs.append(job_data)
-                    scraped_job_ids.add(job_id)
-
-                    if len(jobs) >= num_jobs:
-                        break
-
-                except Exception as e:
-                    print(f"Error parsing job row: {e}")
-
-            # Check for next page using pagination
-            try:
-                pagination = soup.select_one('ul.pagination')
-                if not pagination:
-                    print("Pagination not found.")
-                    break
-
-                current_page = pagination.find('li', class_='active')
-                if not current_page:
-                    print("Current page not found in pagination.")
-                    break
-
-                # Find the next page anchor
-                next_page = current_page.find_next_sibling('li')
-                if not next_page or not next_page.find('a'):
-                    print("No next page available.")
-                    break
-
-                # Click the next page link
-                next_page_link = next_page.find('a')['href']
-                driver.get(base_url + next_page_link)
-
-            except Exception as e:
-                print("Pagination navigation failed:", e)
-                break
+        with span("scrape", portal=portal, keyword=keyword, location=location) as scrape_span:
+            page_html = search_jobs(fetcher, base_url, keyword, location)
+            if page_html is None:
+                scrape_span.outcome = "search_failed"
+                return []
+
+            if scraped_job_ids is None:
+                scraped_job_ids = SeenJobIds()  # To track scraped job IDs in the current session
+            watermark = SearchWatermark(watermark_collection, portal, keyword, location)
+            rows = iter_job_rows(fetcher, base_url, page_html, scraped_job_ids, watermark)
+            jobs = pipeline.run(dict(job, Portal=portal, Keyword=keyword) for job in rows)
+            unwritten = job_writer.close()  # Everything must be stored before the watermark moves past it
+            if pipeline.failed or unwritten:
+                # Those jobs were never stored; crawl in full next time so they are picked up again
+                log.warning("%d jobs failed and %d could not be stored; leaving the watermark incomplete.",
+                            pipeline.failed, unwritten)
+                watermark.exhausted = False
+            watermark.save()
+            scrape_span.tag(jobs=len(jobs), failed=pipeline.failed, unwritten=unwritten)
 
     finally:
-        driver.quit()
+        job_writer.close()
+        fetcher.close()
+        log_timing_summary()
+        client = get_analysis_client()
+        log.info("Analysis cache: %s", client.cache.stats())
+        log.info("LLM usage: %s", client.usage_summary())
+        log.info("Verdicts reused from near-duplicate postings: %d", descriptions.reused)
+
+    return jobs
+
+
+class ArchiveFetcher:
+    """Serves pages from a PageArchive in place of a PageFetcher, for replays."""
+
+    def __init__(self, archive):
+        self.archive = archive
+
+    def get(self, url, markers=None, ready_condition=None, step=None):
+        html = self.archive.latest(url)
+        if html is None:
+            raise LookupError(f"{url} is not in the page archive")
+        return html
+
+    def close(self):
+        pass
 
+
+def iter_archived_rows(archive, url_prefix=None, scraped_job_ids=None):
+    """
+    Yield job rows parsed from the archived results pages.
+
+    Rows whose detail page was never fetched (the scrape stopped before
+    reaching them) are left out.
+
+    Args:
+        archive: PageArchive to read.
+        url_prefix: Only results pages from this portal URL.
+        scraped_job_ids: SeenJobIds, so a job listed on several pages is replayed once.
+    """
+    scraped_job_ids = scraped_job_ids if scraped_job_ids is not None else SeenJobIds()
+    detail_urls = archive.urls(DETAIL_KINDS)
+    for url, kind, fetched_at, page_html in archive.iter_pages(LISTING_KINDS, url_prefix):
+        with span("parse", step="listing"):
+            rows, _ = parse_listing(page_html)
+        keyword = parse_qs(urlsplit(url).query).get('q')
+        for job in jobs_from_rows(url, rows):
+            if job['Link'] in detail_urls and scraped_job_ids.claim(job['Job ID']):
+                job['Portal'] = portal_name(url)
+                if keyword:
+                    job['Keyword'] = keyword[0]
+                yield job
+
+
+def replay_jobs(archive, url_prefix=None, num_jobs=None, fetch_workers=FETCH_WORKERS,
+                analysis_workers=ANALYSIS_WORKERS, db_workers=DB_WORKERS):
+    """
+    Re-run parse -> pre-filter -> analyse -> store over archived pages, without the portal.
+
+    Stored jobs are updated in place (except `Applied` and claims), so new
+    fields are backfilled and verdicts refreshed; the analysis cache makes
+    unchanged postings cost no LLM calls. A job the pre-filter now skips
+    keeps the LLM verdict it already has.
+
+    Args:
+        archive: PageArchive recorded by earlier scrapes.
+        url_prefix: Only replay pages from this portal URL.
+        num_jobs: Optional cap on the jobs replayed.
+
+    Returns:
+        list: The jobs stored.
+    """
+    fetcher = ArchiveFetcher(archive)
+    ensure_indexes(mongo_collection)
+    job_writer = BulkJobWriter(mongo_collection, overwrite=True)
+    descriptions = get_description_store()
+    descriptions.ensure_indexes()
+    pipeline = Pipeline(job_stages(fetcher, "replay", job_writer, descriptions,
+                                   fetch_workers, analysis_workers, db_workers), limit=num_jobs)
+    jobs = []
+    try:
+        with span("replay", portal=portal_name(url_prefix) if url_prefix else "all") as replay_span:
+            jobs = pipeline.run(iter_archived_rows(archive, url_prefix))
+            replay_span.tag(jobs=len(jobs))
+    finally:
+        job_writer.close()
+        log.info("Replayed %d jobs from %s.", len(jobs), archive.path)
+        log.info("LLM usage: %s", get_analysis_client().usage_summary())
     return jobs
 
 
 
 
-# URL for Aramco Careers
-base_url = "link to website"
-jobs_data = scrape_jobs(base_url, keyword="Process Engineer", num_jobs=20)
-# Insert into MongoDB
-print("Job scraping completed. Data saved to MongoDB.")
\ No newline at end of file
+if __name__ == "__main__":
+    # One search per portal, keyword and location in config.py, run concurrently
+    results = run_searches(plan_searches(), scrape_jobs)
+    log.info("Job scraping completed. Data saved to MongoDB.")
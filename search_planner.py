@@ -0,0 +1,109 @@
+"""Expand the search filters in config.py into queries and run them concurrently.
+
+Every combination of portal, keyword and location becomes one query with its
+own budget of new jobs. Queries run in parallel, at most
+`portalConcurrency` at a time against any one portal, and share one
+`SeenJobIds` so a posting returned by several queries is fetched, analysed
+and stored only once. A whole run therefore takes about as long as its
+slowest query rather than the sum of all of them.
+
+The careers portal search only understands a keyword and a location (and
+is always sorted newest first, which the watermarks rely on); the
+LinkedIn-style filters in config.py are reported once as not applied.
+"""
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import product
+
+import config
+from job_store import SeenJobIds
+from tracing import get_logger
+from watermarks import portal_name
+
+log = get_logger("search_planner")
+
+SearchQuery = namedtuple("SearchQuery", "portal_url keyword location budget")
+
+# Filters in config.py that the careers portal search has no parameter for
+UNSUPPORTED_FILTERS = ("experienceLevels", "datePosted", "jobType", "remote", "salary", "sort")
+
+
+def _values(values):
+    """Config filter values without blanks or repeats, keeping their order."""
+    seen = []
+    for value in values or []:
+        value = value.strip()
+        if value and value.lower() not in (v.lower() for v in seen):
+            seen.append(value)
+    return seen
+
+
+def plan_searches(portal_urls=None, keywords=None, locations=None, budget=None):
+    """
+    Build one query per (portal, keyword, location) combination.
+
+    Args:
+        portal_urls: Portal base URLs; defaults to `config.careerPortals`.
+        keywords: Search keywords; defaults to `config.keywords`.
+        locations: Search locations; defaults to `config.location` (an empty
+            list searches every location).
+        budget: New jobs each query may store; defaults to `config.searchBudget`.
+
+    Returns:
+        list: SearchQuery tuples.
+    """
+    portal_urls = _values(config.careerPortals if portal_urls is None else portal_urls)
+    keywords = _values(config.keywords if keywords is None else keywords)
+    locations = _values(config.location if locations is None else locations) or [""]
+    budget = budget or config.searchBudget
+
+    ignored = [name for name in UNSUPPORTED_FILTERS if getattr(config, name, None)]
+    if ignored:
+        log.info("Careers portal search does not support these filters: %s", ", ".join(ignored))
+
+    return [SearchQuery(portal_url, keyword, location, budget)
+            for portal_url, keyword, location in product(portal_urls, keywords, locations)]
+
+
+def run_searches(queries, scrape, max_per_portal=None):
+    """
+    Run `queries` concurrently with at most `max_per_portal` in flight per portal.
+
+    Args:
+        queries: SearchQuery tuples, e.g. from `plan_searches()`.
+        scrape: Function with the signature of `scraper.scrape_jobs`.
+        max_per_portal: Concurrent queries per portal; defaults to `config.portalConcurrency`.
+
+    Returns:
+        dict: SearchQuery -> list of jobs it stored (empty if it failed).
+    """
+    max_per_portal = max_per_portal or config.portalConcurrency
+    portals = {portal_name(query.portal_url) for query in queries}
+    slots = {portal: threading.BoundedSemaphore(max_per_portal) for portal in portals}
+    seen = SeenJobIds()
+
+    def run(query):
+        with slots[portal_name(query.portal_url)]:
+            log.info("Searching %s for '%s' in '%s' (budget %d)", portal_name(query.portal_url),
+                     query.keyword, query.location or "any location", query.budget)
+            return scrape(query.portal_url, keyword=query.keyword, location=query.location,
+                          num_jobs=query.budget, scraped_job_ids=seen)
+
+    results = {}
+    if not queries:
+        return results
+    with ThreadPoolExecutor(max_workers=max_per_portal * len(portals), thread_name_prefix="search") as executor:
+        futures = {executor.submit(run, query): query for query in queries}
+        for future in as_completed(futures):
+            query = futures[future]
+            try:
+                results[query] = future.result()
+            except Exception as e:
+                log.error("Search '%s' in '%s' on %s failed: %s", query.keyword, query.location,
+                          portal_name(query.portal_url), e)
+                results[query] = []
+
+    log.info("Ran %d searches: %d new jobs, %d distinct postings seen",
+             len(queries), sum(len(jobs) for jobs in results.values()), len(seen))
+    return results
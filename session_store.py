@@ -0,0 +1,179 @@
+"""Validated browser sessions shared across pooled drivers.
+
+Cookies are stored per site and account as JSON (not pickle), together
+with when they were saved, so a session can be checked from cookie expiry
+alone instead of loading a page and probing for login elements. The same
+store injects its cookies into every pooled browser once, and is re-saved
+from a live browser when it gets close to expiring so the server's renewed
+cookies are kept.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+from tracing import get_logger
+
+SESSIONS_DIR = "sessions"
+REFRESH_MARGIN = 12 * 3600        # Refresh sessions expiring within 12 hours...
+REFRESH_FRACTION = 0.25           # ...or within this share of their lifetime, if that is shorter
+SESSION_COOKIE_MAX_AGE = 8 * 3600 # How long cookies without an expiry are trusted
+log = get_logger("session_store")
+
+
+class SessionStore:
+    """
+    Cookies for one account on one site.
+
+    Args:
+        site: Short site name, e.g. "linkedin" or "portal".
+        account: Account identifier (e.g. the login email); hashed into the file name.
+        required_cookies: Cookie names that must be present and unexpired for the
+            session to count as valid; if empty, every stored cookie is checked.
+        directory: Where session files are kept.
+    """
+
+    def __init__(self, site, account, required_cookies=(), directory=SESSIONS_DIR):
+        self.site = site
+        self.required_cookies = tuple(required_cookies)
+        account_hash = hashlib.sha256((account or "").encode("utf-8")).hexdigest()[:16]
+        self.path = os.path.join(directory, f"{site}-{account_hash}.json")
+        self._lock = threading.Lock()
+        self._applied = set()  # session_ids of browsers that already carry these cookies
+        self._mtime = 0
+        self._data = self._read()
+
+    def _read(self):
+        try:
+            self._mtime = os.path.getmtime(self.path)
+            with open(self.path, "r") as file:
+                return json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {"saved_at": 0, "cookies": []}
+
+    def reload_if_changed(self):
+        """Pick up a session saved by another process since we last read it."""
+        try:
+            changed = os.path.getmtime(self.path) != self._mtime
+        except FileNotFoundError:
+            return
+        if changed:
+            with self._lock:
+                self._data = self._read()
+                self._applied.clear()
+
+    @property
+    def cookies(self):
+        return self._data["cookies"]
+
+    def _relevant_cookies(self):
+        if not self.required_cookies:
+            return self.cookies
+        return [cookie for cookie in self.cookies if cookie["name"] in self.required_cookies]
+
+    def expires_at(self):
+        """Earliest expiry (epoch seconds) among the cookies the session depends on, or 0."""
+        cookies = self._relevant_cookies()
+        names = {cookie["name"] for cookie in cookies}
+        if not cookies or any(name not in names for name in self.required_cookies):
+            return 0
+        return min(cookie.get("expiry", self._data["saved_at"] + SESSION_COOKIE_MAX_AGE)
+                   for cookie in cookies)
+
+    def is_valid(self, now=None):
+        """True if the stored cookies have not expired."""
+        return self.expires_at() > (now or time.time())
+
+    def needs_refresh(self, now=None):
+        """
+        True if the session is missing or close to expiry.
+
+        Close means within REFRESH_MARGIN, or within REFRESH_FRACTION of the
+        session's lifetime when that is shorter, so a session that only lives
+        SESSION_COOKIE_MAX_AGE isn't due for a refresh as soon as it is saved.
+        """
+        expires_at = self.expires_at()
+        margin = min(REFRESH_MARGIN, REFRESH_FRACTION * (expires_at - self._data["saved_at"]))
+        return expires_at - (now or time.time()) < margin
+
+    def save(self, driver):
+        """Store the browser's current cookies, written atomically and readable only by the owner."""
+        with self._lock:
+            self._data = {"saved_at": time.time(), "cookies": driver.get_cookies()}
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)  # A leftover file would keep its old permissions
+            # Created owner-only, so the cookies are never readable by others, even briefly
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w") as file:
+                json.dump(self._data, file)
+            os.replace(tmp_path, self.path)
+            self._mtime = os.path.getmtime(self.path)
+            self._applied = {driver.session_id}  # Other browsers now hold stale cookies
+        log.debug("Saved %s session (%d cookies).", self.site, len(self.cookies))
+
+    def refresh_from(self, driver):
+        """Re-save from a logged-in browser if the stored session is close to expiry."""
+        if self.needs_refresh():
+            self.save(driver)
+
+    def apply(self, driver, url):
+        """
+        Inject the stored cookies into `driver` unless it already has them.
+
+        Selenium only accepts cookies for the current domain, so the browser
+        first opens the site's robots.txt, which is small and never redirects
+        to a login page.
+
+        Args:
+            driver: WebDriver (pooled or not).
+            url: Any URL on the site the cookies belong to.
+
+        Returns:
+            bool: True if the driver now carries a valid stored session.
+        """
+        self.reload_if_changed()
+        if not self.is_valid():
+            return False
+        with self._lock:
+            if driver.session_id in self._applied:
+                return True
+            origin = "/".join(url.split("/")[:3])
+            driver.get(f"{origin}/robots.txt")
+            now = time.time()
+            for cookie in self.cookies:
+                if cookie.get("expiry", now + 1) <= now:
+                    continue
+                cookie = {key: value for key, value in cookie.items() if key != "sameSite" or value}
+                try:
+                    driver.add_cookie(cookie)
+                except Exception as e:
+                    log.debug("Skipped cookie %s: %s", cookie.get('name'), e)
+            self._applied.add(driver.session_id)
+        log.debug("Restored %s session into browser.", self.site)
+        return True
+
+    def invalidate(self):
+        """Forget the stored session, e.g. after the site rejected it."""
+        with self._lock:
+            self._data = {"saved_at": 0, "cookies": []}
+            self._applied.clear()
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_session_store(site, account, required_cookies=()):
+    """Return the process-wide SessionStore for `site` and `account`."""
+    with _stores_lock:
+        key = (site, account)
+        if key not in _stores:
+            _stores[key] = SessionStore(site, account, required_cookies)
+        return _stores[key]
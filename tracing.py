@@ -0,0 +1,269 @@
+"""Tracing spans, metrics export and sampled, levelled logging.
+
+Wrap a unit of work in a span to time it and tag it:
+
+    with span("prefilter", job_id=job["Job ID"], portal="careers") as s:
+        score, reason = screen_job(...)
+        if reason:
+            s.outcome = "skipped"
+
+Spans started inside another span on the same thread inherit its tags
+(e.g. `job_id` and `portal`) and record it as their parent. Finished spans
+are appended as JSON lines to `config.traceFile` and aggregated into
+per-span latency histograms, which are written in Prometheus text format to
+`config.metricsFile` at exit (or on `write_metrics()`), and can also be
+served on `/metrics` with `serve_metrics(port)`. Once the trace file
+reaches `config.traceMaxBytes` it is rotated to `<traceFile>.1`, so a
+long-running daemon keeps at most two files. Several processes (e.g.
+`applier --workers N`) can share the file: only one of them rotates it, under
+a lock file, and the others reopen the new file before their next write.
+
+`get_logger(name)` returns a logger at `config.logLevel` (or the LOG_LEVEL
+environment variable). Debug and info lines logged with `extra=job_log(id)`
+are sampled per job at `config.logSampleRate`, so every line of a sampled
+job is kept and the rest are dropped; warnings and errors always get through.
+"""
+import atexit
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+import zlib
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import config
+
+# Upper bounds (seconds) of the latency histogram buckets
+BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Tags that become Prometheus labels; the rest (job ID, URL, ...) only go to the trace file
+METRIC_LABELS = ("portal", "step", "op", "via", "outcome")
+STALE_LOCK_SECONDS = 60  # A rotation lock older than this was left by a crashed process
+
+_local = threading.local()
+_ids = itertools.count(1)
+_lock = threading.Lock()
+_trace_file = None
+# (span name, labels) -> [bucket counts..., count, sum]
+_histograms = defaultdict(lambda: [0] * len(BUCKETS) + [0, 0.0])
+
+
+class Span:
+    """One timed unit of work. Set `outcome` or call `tag()` before it ends."""
+
+    def __init__(self, name, parent=None, **tags):
+        self.name = name
+        self.span_id = f"{os.getpid():x}-{next(_ids):x}"
+        self.parent_id = parent.span_id if parent else None
+        self.trace_id = parent.trace_id if parent else self.span_id
+        self.tags = dict(parent.tags) if parent else {}
+        self.tags.update(tags)
+        self.outcome = "ok"
+        self.start = time.time()
+        self._started = time.monotonic()
+        self.duration = None
+
+    def tag(self, **tags):
+        self.tags.update(tags)
+
+    def finish(self):
+        self.duration = time.monotonic() - self._started
+        _record(self)
+
+    def to_dict(self):
+        return {"name": self.name, "trace_id": self.trace_id, "span_id": self.span_id,
+                "parent_id": self.parent_id, "start": self.start, "duration": self.duration,
+                "outcome": self.outcome, **self.tags}
+
+
+class span:
+    """Context manager that times a block as a Span; an exception sets outcome "error"."""
+
+    def __init__(self, name, **tags):
+        self.name = name
+        self.tags = tags
+
+    def __enter__(self):
+        stack = _stack()
+        self.span = Span(self.name, stack[-1] if stack else None, **self.tags)
+        stack.append(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        _stack().pop()
+        if exc_type is not None:
+            self.span.outcome = "error"
+            self.span.tags["error"] = exc_type.__name__
+        self.span.finish()
+        return False
+
+
+def _stack():
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+def current_span():
+    """The innermost open span on this thread, or None."""
+    stack = _stack()
+    return stack[-1] if stack else None
+
+
+def _record(finished):
+    labels = tuple((key, str(finished.outcome if key == "outcome" else finished.tags[key]))
+                   for key in METRIC_LABELS if key == "outcome" or key in finished.tags)
+    with _lock:
+        histogram = _histograms[(finished.name, labels)]
+        for i, bound in enumerate(BUCKETS):
+            if finished.duration <= bound:
+                histogram[i] += 1
+        histogram[-2] += 1
+        histogram[-1] += finished.duration
+
+        if config.traceFile:
+            if _trace_file is None or _trace_file_replaced():
+                _open_trace_file()
+            _trace_file.write(json.dumps(finished.to_dict(), default=str) + "\n")
+            if _trace_file.tell() >= config.traceMaxBytes:
+                _rotate_trace_file()
+
+
+def _open_trace_file():
+    global _trace_file
+    if _trace_file is not None:
+        _trace_file.close()
+    _trace_file = open(config.traceFile, "a", buffering=1)  # Line buffered
+
+
+def _trace_file_replaced():
+    """True if another process rotated the trace file away from under our handle."""
+    try:
+        return os.stat(config.traceFile).st_ino != os.fstat(_trace_file.fileno()).st_ino
+    except FileNotFoundError:
+        return True
+
+
+def _rotate_trace_file():
+    """Move the full trace file to `<traceFile>.1`, replacing the previous one, and start a new file."""
+    lock_path = config.traceFile + ".lock"
+    try:
+        if time.time() - os.path.getmtime(lock_path) > STALE_LOCK_SECONDS:
+            os.remove(lock_path)
+    except FileNotFoundError:
+        pass
+    try:
+        lock = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return  # Another process is rotating; we reopen the new file on our next write
+    try:
+        # Another process may have rotated between our write and taking the lock
+        if not _trace_file_replaced() and os.path.getsize(config.traceFile) >= config.traceMaxBytes:
+            _trace_file.close()
+            os.replace(config.traceFile, config.traceFile + ".1")
+    except OSError as e:  # E.g. Windows refuses to rename a file other processes hold open
+        get_logger("tracing").debug("Could not rotate %s: %s", config.traceFile, e)
+    finally:
+        os.close(lock)
+        os.remove(lock_path)
+    _open_trace_file()
+
+
+def _labels(labels, **extra):
+    pairs = list(labels) + list(extra.items())
+    return "{" + ",".join(f'{key}="{value}"' for key, value in pairs) + "}"
+
+
+def metrics_text():
+    """Span latency histograms in Prometheus text exposition format."""
+    lines = ["# HELP jobbot_span_seconds Time spent in traced operations.",
+             "# TYPE jobbot_span_seconds histogram"]
+    with _lock:
+        snapshot = {key: list(values) for key, values in _histograms.items()}
+    for (name, labels), values in sorted(snapshot.items()):
+        labels = (("span", name),) + labels
+        for bound, count in zip(BUCKETS, values):
+            lines.append(f"jobbot_span_seconds_bucket{_labels(labels, le=bound)} {count}")
+        lines.append(f'jobbot_span_seconds_bucket{_labels(labels, le="+Inf")} {values[-2]}')
+        lines.append(f"jobbot_span_seconds_count{_labels(labels)} {values[-2]}")
+        lines.append(f"jobbot_span_seconds_sum{_labels(labels)} {values[-1]:.6f}")
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics(path=None):
+    """Write `metrics_text()` atomically to `path` (default `config.metricsFile`)."""
+    path = path or config.metricsFile
+    if not path:
+        return
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as file:
+        file.write(metrics_text())
+    os.replace(tmp_path, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = metrics_text().encode("utf-8")
+        self.send_response(200 if self.path.startswith("/metrics") else 404)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_metrics(port=None):
+    """Serve `/metrics` on `port` (default `config.metricsPort`) from a daemon thread."""
+    port = port or config.metricsPort
+    server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True, name="metrics").start()
+    return server
+
+
+def flush():
+    """Write the metrics file and flush the trace file."""
+    with _lock:
+        if _trace_file is not None:
+            _trace_file.flush()
+    write_metrics()
+
+
+atexit.register(flush)
+
+
+class JobSampleFilter(logging.Filter):
+    """Keep debug/info records of a `logSampleRate` share of jobs, chosen by job ID."""
+
+    def filter(self, record):
+        job_id = getattr(record, "job_id", None)
+        if job_id is None or record.levelno >= logging.WARNING:
+            return True
+        rate = config.logSampleRate
+        return zlib.crc32(str(job_id).encode("utf-8")) % 10000 < rate * 10000
+
+
+def job_log(job_id):
+    """`extra=` argument marking a log record as belonging to job `job_id`."""
+    return {"job_id": job_id}
+
+
+_handler = None
+
+
+def get_logger(name):
+    """A logger writing levelled, per-job sampled lines to stderr."""
+    global _handler
+    if _handler is None:
+        _handler = logging.StreamHandler()
+        _handler.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(name)s: %(message)s"))
+        _handler.addFilter(JobSampleFilter())
+    logger = logging.getLogger(f"jobbot.{name}")
+    if _handler not in logger.handlers:
+        logger.addHandler(_handler)
+        logger.propagate = False
+    logger.setLevel(os.getenv("LOG_LEVEL", config.logLevel).upper())
+    return logger
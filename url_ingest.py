@@ -0,0 +1,252 @@
+"""Streaming, checkpointed URL sources and buffered result writes for the LinkedIn bot.
+
+URLs are read lazily, one at a time, from either a text file
+(`FileUrlSource`) or a MongoDB queue collection (`MongoUrlQueue`), so a
+list of any size runs in constant memory. Each URL carries a checkpoint
+token; the source only records progress for URLs whose results have been
+written, so a run that crashes resumes after the last flushed result
+instead of starting over.
+
+`iter_unhandled` looks URLs up in chunks against the indexed `url` field of
+the results collection and skips those already handled. `ResultWriter`
+buffers result documents and writes them with one `insert_many` per batch.
+"""
+import os
+import re
+import threading
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+from urllib.parse import parse_qs, urlsplit, urlunsplit
+
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from tracing import get_logger, span
+
+UrlItem = namedtuple("UrlItem", "url token")
+
+CHUNK_SIZE = 50
+QUEUE_LEASE = timedelta(minutes=30)
+log = get_logger("url_ingest")
+
+
+def normalize_url(url):
+    """
+    Strip whitespace, query string, fragment and trailing slash so the same job always matches.
+
+    LinkedIn search and collection pages name the job only in `currentJobId`
+    (e.g. /jobs/collections/recommended/?currentJobId=123), so those become
+    the job's canonical /jobs/view/<id> URL instead.
+    """
+    parts = urlsplit(url.strip())
+    netloc = parts.netloc.lower()
+    if netloc == "linkedin.com" or netloc.endswith(".linkedin.com"):
+        job_id = parse_qs(parts.query).get("currentJobId", [""])[0]
+        if job_id.isdigit():
+            return urlunsplit((parts.scheme.lower(), netloc, f"/jobs/view/{job_id}", "", ""))
+    return urlunsplit((parts.scheme.lower(), netloc, parts.path.rstrip("/"), "", ""))
+
+
+def linkedin_job_id(url):
+    """LinkedIn job ID from a /jobs/view/<id> URL, or the last path segment."""
+    match = re.search(r"/jobs/view/(?:[^/]*-)?(\d+)", url)
+    if match:
+        return match.group(1)
+    segments = [segment for segment in urlsplit(url).path.split("/") if segment]
+    return segments[-1] if segments else url
+
+
+class FileUrlSource:
+    """
+    URLs from a text file, one per line, resumed from a byte offset stored in MongoDB.
+
+    Args:
+        path: File to read; blank lines and lines starting with '#' are skipped.
+        checkpoints: Collection holding one checkpoint document per file.
+    """
+
+    def __init__(self, path, checkpoints):
+        self.path = path
+        self.checkpoints = checkpoints
+        self.key = f"file:{os.path.abspath(path)}"
+
+    def __iter__(self):
+        stored = self.checkpoints.find_one({"_id": self.key}) or {}
+        offset = stored.get("offset", 0)
+        if offset > os.path.getsize(self.path):
+            offset = 0  # The file was replaced by a shorter one; start again
+        if offset:
+            log.info("Resuming %s at byte %d.", self.path, offset)
+        with open(self.path, "rb") as file:
+            file.seek(offset)
+            for line in file:
+                offset += len(line)
+                url = line.decode("utf-8").strip()
+                if url and not url.startswith("#"):
+                    yield UrlItem(normalize_url(url), offset)
+                else:
+                    yield UrlItem(None, offset)
+
+    def commit(self, tokens):
+        """Record that everything up to the largest offset in `tokens` is handled."""
+        self.checkpoints.update_one(
+            {"_id": self.key},
+            {"$max": {"offset": max(tokens)}, "$set": {"updated_at": datetime.now(timezone.utc)}},
+            upsert=True,
+        )
+
+
+class MongoUrlQueue:
+    """
+    URLs queued in a MongoDB collection, claimed one at a time with a lease.
+
+    Documents look like `{"url": ..., "status": "pending" | "processing" | "done"}`.
+    A URL whose worker died while processing it is claimed again once its
+    lease has run out.
+
+    Args:
+        collection: Queue collection.
+        worker_id: Identifier stored on claims.
+        lease: How long a claim holds.
+    """
+
+    def __init__(self, collection, worker_id="linkedin", lease=QUEUE_LEASE):
+        self.collection = collection
+        self.worker_id = worker_id
+        self.lease = lease
+        collection.create_index("url", unique=True)
+        collection.create_index([("status", 1), ("lease_expires", 1)])
+
+    def enqueue(self, urls):
+        """Add URLs that are not queued yet; returns how many were added."""
+        added = 0
+        for url in urls:
+            try:
+                result = self.collection.update_one(
+                    {"url": normalize_url(url)},
+                    {"$setOnInsert": {"status": "pending", "queued_at": datetime.now(timezone.utc)}},
+                    upsert=True,
+                )
+                added += result.upserted_id is not None
+            except DuplicateKeyError:
+                pass
+        return added
+
+    def __iter__(self):
+        while True:
+            now = datetime.now(timezone.utc)
+            doc = self.collection.find_one_and_update(
+                {"$or": [{"status": "pending"},
+                         {"status": "processing", "lease_expires": {"$lt": now}}]},
+                {"$set": {"status": "processing", "worker": self.worker_id,
+                          "lease_expires": now + self.lease}},
+                sort=[("_id", 1)],
+                return_document=ReturnDocument.AFTER,
+            )
+            if doc is None:
+                return
+            yield UrlItem(doc["url"], doc["_id"])
+
+    def commit(self, tokens):
+        """Mark the queued URLs behind `tokens` as done."""
+        self.collection.update_many({"_id": {"$in": list(tokens)}},
+                                    {"$set": {"status": "done", "done_at": datetime.now(timezone.utc)},
+                                     "$unset": {"lease_expires": ""}})
+
+
+class ResultWriter:
+    """
+    Buffer result documents and write them with `insert_many`.
+
+    After every write the source is told which checkpoint tokens are now
+    safe, so progress is never recorded ahead of the results.
+
+    Args:
+        collection: Results collection.
+        source: URL source whose `commit(tokens)` is called after each flush.
+        batch_size: Flush once this many results are buffered.
+    """
+
+    def __init__(self, collection, source, batch_size=CHUNK_SIZE):
+        self.collection = collection
+        self.source = source
+        self.batch_size = batch_size
+        self._docs = []
+        self._tokens = []
+        self._lock = threading.Lock()
+        self.written = 0
+
+    def add(self, doc, token):
+        """Buffer a result; `doc` may be None to only advance the checkpoint."""
+        with self._lock:
+            if doc is not None:
+                self._docs.append(doc)
+            self._tokens.append(token)
+            full = len(self._docs) >= self.batch_size
+        if full:
+            self.flush()
+
+    def pending_urls(self):
+        with self._lock:
+            return {doc["url"] for doc in self._docs}
+
+    def flush(self):
+        """Write buffered results in one round trip, then commit their checkpoints."""
+        with self._lock:
+            docs, self._docs = self._docs, []
+            tokens, self._tokens = self._tokens, []
+        if docs:
+            with span("mongo", op="insert_many", jobs=len(docs)):
+                try:
+                    self.collection.insert_many(docs, ordered=False)
+                except BulkWriteError as e:
+                    # Results for URLs another run already stored are not an error
+                    errors = [err for err in e.details.get("writeErrors", []) if err.get("code") != 11000]
+                    if errors:
+                        raise
+            self.written += len(docs)
+        if tokens:
+            self.source.commit(tokens)
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def find_handled_urls(collection, urls):
+    """Return the subset of `urls` that already have a result, with one indexed `$in` query."""
+    urls = list(set(urls))
+    if not urls:
+        return set()
+    with span("mongo", op="find_handled", jobs=len(urls)):
+        return {doc["url"] for doc in collection.find({"url": {"$in": urls}}, {"url": 1, "_id": 0})}
+
+
+def iter_unhandled(source, collection, writer, chunk_size=CHUNK_SIZE):
+    """
+    Yield UrlItems from `source` that have no stored result yet.
+
+    URLs are looked up `chunk_size` at a time; skipped and blank entries
+    are passed to `writer` so their checkpoints advance with the rest.
+    """
+    chunk = []
+    items = iter(source)
+    while True:
+        for item in items:
+            chunk.append(item)
+            if len(chunk) >= chunk_size:
+                break
+        if not chunk:
+            return
+        handled = find_handled_urls(collection, [item.url for item in chunk if item.url])
+        for item in chunk:
+            if item.url is None or item.url in handled or item.url in writer.pending_urls():
+                writer.add(None, item.token)
+                continue
+            yield item
+        chunk = []
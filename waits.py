@@ -0,0 +1,158 @@
+"""Condition-based waits shared by the scraper, applier and LinkedIn bot.
+
+Instead of sleeping for a fixed number of seconds, callers wait on a
+condition (DOM ready, selector present, URL change, network idle) with a
+per-step timeout. Every wait records how long it actually took so slow
+steps can be spotted with `timing_summary()`.
+"""
+import random
+import time
+from collections import defaultdict
+
+from tracing import get_logger
+
+DEFAULT_TIMEOUT = 15
+POLL_FREQUENCY = 0.2
+CSS_SELECTOR = "css selector"  # selenium's By.CSS_SELECTOR; selenium is imported only when waiting
+
+# Per-step timeouts in seconds; steps not listed use DEFAULT_TIMEOUT.
+STEP_TIMEOUTS = {
+    "search_results": 15,
+    "results_page": 15,
+    "job_detail": 15,
+    "cookie_restore": 10,
+    "login": 30,
+    "job_page": 20,
+    "apply_dialog": 15,
+    "submit_application": 20,
+    "linkedin_login": 20,
+    "linkedin_job": 15,
+    "easy_apply": 10,
+}
+
+# step name -> list of elapsed seconds for every wait on that step
+wait_timings = defaultdict(list)
+log = get_logger("waits")
+
+
+def dom_ready(driver):
+    """True once the document has finished loading."""
+    return driver.execute_script("return document.readyState") == "complete"
+
+
+def selector_present(css_selector):
+    """Condition: the first element matching `css_selector`, or False."""
+    def condition(driver):
+        elements = driver.find_elements(CSS_SELECTOR, css_selector)
+        return elements[0] if elements else False
+    return condition
+
+
+def selector_absent(css_selector):
+    """Condition: no element matches `css_selector`."""
+    def condition(driver):
+        return not driver.find_elements(CSS_SELECTOR, css_selector)
+    return condition
+
+
+def url_changed(old_url):
+    """Condition: the current URL differs from `old_url`."""
+    def condition(driver):
+        return driver.current_url != old_url
+    return condition
+
+
+def network_idle(idle_time=0.5):
+    """Condition: no new resources were fetched for `idle_time` seconds.
+
+    Uses the Resource Timing API, so it only sees requests made by the
+    current document.
+    """
+    state = {"count": -1, "since": time.monotonic()}
+
+    def condition(driver):
+        if not dom_ready(driver):
+            return False
+        count = driver.execute_script(
+            "return window.performance.getEntriesByType('resource').length"
+        )
+        now = time.monotonic()
+        if count != state["count"]:
+            state["count"] = count
+            state["since"] = now
+            return False
+        return now - state["since"] >= idle_time
+    return condition
+
+
+def all_of(*conditions):
+    """Condition: every condition holds; returns the last result."""
+    def condition(driver):
+        result = True
+        for cond in conditions:
+            result = cond(driver)
+            if not result:
+                return False
+        return result
+    return condition
+
+
+def any_of(*conditions):
+    """Condition: the first condition that holds; returns its result."""
+    def condition(driver):
+        for cond in conditions:
+            result = cond(driver)
+            if result:
+                return result
+        return False
+    return condition
+
+
+def wait_for(driver, condition, step, timeout=None, jitter=None, raise_on_timeout=False):
+    """
+    Wait until `condition(driver)` is truthy and record the elapsed time.
+
+    Args:
+        driver: Selenium WebDriver instance.
+        condition: Callable taking the driver and returning a truthy value when done.
+        step: Name of the step, used for the timeout lookup and timing records.
+        timeout: Seconds to wait; defaults to STEP_TIMEOUTS[step] or DEFAULT_TIMEOUT.
+        jitter: Optional (low, high) range of extra random seconds to pause afterwards.
+        raise_on_timeout: Re-raise TimeoutException instead of returning False.
+
+    Returns:
+        The condition's result, or False if it timed out.
+    """
+    from selenium.common.exceptions import TimeoutException
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    if timeout is None:
+        timeout = STEP_TIMEOUTS.get(step, DEFAULT_TIMEOUT)
+    start = time.monotonic()
+    try:
+        result = WebDriverWait(driver, timeout, poll_frequency=POLL_FREQUENCY).until(condition)
+    except TimeoutException:
+        if raise_on_timeout:
+            raise
+        result = False
+    finally:
+        wait_timings[step].append(time.monotonic() - start)
+
+    if jitter:
+        time.sleep(random.uniform(*jitter))
+    return result
+
+
+def timing_summary():
+    """Return {step: {"count", "total", "max"}} for every recorded wait."""
+    return {
+        step: {"count": len(times), "total": sum(times), "max": max(times)}
+        for step, times in wait_timings.items()
+    }
+
+
+def log_timing_summary():
+    """Log recorded wait timings, slowest steps first."""
+    summary = timing_summary()
+    for step, stats in sorted(summary.items(), key=lambda item: -item[1]["total"]):
+        log.info("Waits on %s: %d, %.2fs total, %.2fs max", step, stats['count'], stats['total'], stats['max'])
@@ -0,0 +1,82 @@
+"""Per-search watermarks for incremental scraping.
+
+Results are requested newest first, so on a re-run everything below the
+newest job seen last time is already stored. A watermark records that job
+ID for each (portal, keyword, location) search, and pagination stops as soon
+as a page reaches it or holds only known jobs.
+
+A run that stops because it hit `num_jobs` leaves older jobs unscraped, and
+one whose pipeline dropped a job after an error never stored it, so their
+watermarks are saved as incomplete and the next run crawls in full until
+one gets to the end again.
+"""
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+
+from tracing import get_logger
+
+log = get_logger("watermarks")
+
+
+def portal_name(base_url):
+    """Identify a portal by its host name."""
+    return urlparse(base_url).netloc or base_url
+
+
+class SearchWatermark:
+    """
+    Watermark state for one search during a scrape.
+
+    Args:
+        collection: MongoDB collection holding the watermarks.
+        portal: Portal identifier, e.g. from `portal_name(base_url)`.
+        keyword: Search keyword.
+        location: Search location.
+    """
+
+    def __init__(self, collection, portal, keyword, location):
+        self.collection = collection
+        self.key = {"portal": portal, "keyword": keyword.lower(), "location": location.lower()}
+        stored = collection.find_one(self.key) or {}
+        self.previous_job_id = stored.get("newest_job_id")
+        self.complete = stored.get("complete", False)
+        self.newest_job_id = None
+        self.exhausted = False
+        self.pages = 0
+
+    def observe_page(self, job_ids, known_ids):
+        """
+        Record a results page and decide whether to stop after it.
+
+        Args:
+            job_ids: Job IDs on the page, in page order.
+            known_ids: IDs already stored or handled in this session.
+
+        Returns:
+            bool: True if the following pages only hold jobs we already have.
+        """
+        self.pages += 1
+        if self.newest_job_id is None and job_ids:
+            self.newest_job_id = job_ids[0]
+        if not self.complete:
+            return False
+        if self.previous_job_id in job_ids:
+            log.info("Reached watermark %s on page %d.", self.previous_job_id, self.pages)
+            return True
+        if all(job_id in known_ids for job_id in job_ids):
+            log.info("Page %d only holds known jobs.", self.pages)
+            return True
+        return False
+
+    def save(self):
+        """Persist the watermark; incomplete unless the crawl ran to its natural end."""
+        self.collection.update_one(
+            self.key,
+            {"$set": {
+                "newest_job_id": self.newest_job_id or self.previous_job_id,
+                "complete": self.exhausted,
+                "pages_scanned": self.pages,
+                "updated_at": datetime.now(timezone.utc),
+            }},
+            upsert=True,
+        )